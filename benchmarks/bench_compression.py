@@ -0,0 +1,92 @@
+"""
+Выбор алгоритма сжатия записей хранилища по степени сжатия и скорости.
+
+    python benchmarks/bench_compression.py --count 20000
+
+Каждая запись сжимается и шифруется отдельно, как при записи снимка.
+Для каждого доступного алгоритма выводятся размер файла, время записи
+(сжатие и шифрование) и чтения (расшифровка и распаковка).
+
+Рекомендуется алгоритм с наименьшей оценкой - временем полной загрузки
+и одной перезаписи снимка: файл читается и пишется с диска со скоростью
+--disk-mb МБ/с, расшифровываются все записи, а заново сжимается и
+шифруется только доля --changed измененных (для остальных при записи
+снимка берутся готовые токены).
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from cryptography.fernet import Fernet
+
+from compression import CODECS
+
+SEED = 1234
+
+
+def sample_entries(count):
+    """Воспроизводимый набор записей, похожих на настоящие"""
+    rng = random.Random(SEED)
+    words = ['github', 'gitlab', 'google', 'mail', 'bank', 'shop', 'cloud', 'forum', 'stripe']
+    domains = ['com', 'org', 'net', 'io', 'ru']
+    alphabet = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789!@#$%^&*'
+    entries = []
+    for i in range(1, count + 1):
+        stamp = f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}"
+        entries.append({
+            'id': i,
+            'service': f"{rng.choice(words)}{rng.randint(1, 9999)}.{rng.choice(domains)}",
+            'username': f"user{rng.randint(1, 99999)}@{rng.choice(['gmail.com', 'mail.com', 'example.org'])}",
+            'password': ''.join(rng.choice(alphabet) for _ in range(rng.randint(12, 24))),
+            'notes': rng.choice(['', '', '', 'рабочий аккаунт', 'backup codes in safe']),
+            'created_at': stamp,
+            'updated_at': stamp
+        })
+    return [json.dumps(entry).encode() for entry in entries]
+
+
+def run(count, disk_mb, changed):
+    """Замер каждого алгоритма и выбор рекомендуемого"""
+    cipher = Fernet(Fernet.generate_key())
+    payloads = sample_entries(count)
+    raw_size = sum(len(p) for p in payloads)
+    print(f"записей: {count}, JSON: {raw_size / 1e6:.2f} МБ, диск: {disk_mb} МБ/с, "
+          f"изменено: {changed:.0%}")
+    print(f"{'алгоритм':>9} {'сжатие':>8} {'файл МБ':>8} {'запись с':>9} {'чтение с':>9} {'оценка с':>9}")
+
+    scores = {}
+    for codec in CODECS.values():
+        start = time.perf_counter()
+        tokens = [cipher.encrypt(codec.compress(p)) for p in payloads]
+        write = time.perf_counter() - start
+
+        start = time.perf_counter()
+        restored = [codec.decompress(cipher.decrypt(t)) for t in tokens]
+        read = time.perf_counter() - start
+        assert restored == payloads
+
+        # В контейнере токены хранятся без base64
+        size = sum(len(t) for t in tokens) * 3 / 4
+        compressed = sum(len(codec.compress(p)) for p in payloads)
+        scores[codec.name] = read + changed * write + 2 * size / (disk_mb * 1e6)
+        print(f"{codec.name:>9} {raw_size / compressed:8.2f} {size / 1e6:8.2f} "
+              f"{write:9.3f} {read:9.3f} {scores[codec.name]:9.3f}")
+
+    best = min(scores, key=scores.get)
+    print(f"рекомендуется: {best}")
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк сжатия записей хранилища")
+    parser.add_argument('--count', type=int, default=20000)
+    parser.add_argument('--disk-mb', type=float, default=200.0)
+    parser.add_argument('--changed', type=float, default=0.1)
+    args = parser.parse_args()
+
+    run(args.count, args.disk_mb, args.changed)
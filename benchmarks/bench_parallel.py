@@ -0,0 +1,42 @@
+"""
+Масштабирование параллельной генерации по числу процессов.
+
+    python benchmarks/bench_parallel.py --count 1000000 --length 16
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from generator import generator
+from parallel import ParallelGenerator
+
+
+def run(count, length, workers_list):
+    """Замер пропускной способности для каждого числа процессов"""
+    start = time.perf_counter()
+    generator.generate_batch(count, length)
+    baseline = time.perf_counter() - start
+    print(f"{'процессов':>10} {'сек':>8} {'паролей/с':>12} {'ускорение':>10}")
+    print(f"{'батч':>10} {baseline:8.3f} {count / baseline:12.0f} {1.0:10.2f}")
+
+    for workers in workers_list:
+        engine = ParallelGenerator(workers=workers)
+        start = time.perf_counter()
+        total = sum(1 for _ in engine.iter_passwords(count, length))
+        elapsed = time.perf_counter() - start
+        assert total == count
+        print(f"{workers:>10} {elapsed:8.3f} {count / elapsed:12.0f} {baseline / elapsed:10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк параллельной генерации")
+    parser.add_argument('--count', type=int, default=1000000)
+    parser.add_argument('--length', type=int, default=16)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    print(f"CPU: {os.cpu_count()}, паролей: {args.count}, длина: {args.length}")
+    run(args.count, args.length, args.workers)
@@ -0,0 +1,96 @@
+"""
+Время разблокировки, полного чтения и записи хранилища по числу шардов.
+
+    python benchmarks/bench_shards.py --count 100000 --shards 0 1 4 8 16
+
+Для каждого числа шардов хранилище с --count записями создается заново
+во временной директории. Разблокировка и полное чтение (расшифровка всех
+записей) замеряются на новом объекте хранилища, чтобы ничего не бралось
+из памяти; запись - изменение одной записи, при котором переписываются
+только ее шард и манифест. 0 шардов - все записи в самом файле хранилища.
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from vault import PasswordVault
+
+MASTER_PASSWORD = 'bench-master-password'
+
+
+def sample_entries(count):
+    """Записи, похожие на настоящие"""
+    return [{
+        'id': i,
+        'service': f"service{i}.com",
+        'username': f"user{i}@example.org",
+        'password': f"pw-{i:08d}-Xq!z",
+        'notes': 'рабочий аккаунт' if i % 4 == 0 else '',
+        'created_at': '2026-01-01 00:00',
+        'updated_at': '2026-01-01 00:00'
+    } for i in range(1, count + 1)]
+
+
+def timed(func):
+    """Время вызова func и ее результат"""
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def run(count, shards_list, workers, repeat):
+    """Замер для каждого числа шардов"""
+    entries = sample_entries(count)
+    print(f"{'шардов':>7} {'разблок. с':>11} {'чтение с':>9} {'запись с':>9} {'ускорение':>10}")
+
+    baseline = None
+    for shards in shards_list:
+        directory = tempfile.mkdtemp(prefix='bench_shards_')
+        try:
+            path = os.path.join(directory, 'vault.dat')
+            store = PasswordVault(path, shards=shards, workers=workers)
+            store.create_vault(MASTER_PASSWORD)
+            store.save_passwords(entries)
+            store.lock_vault()
+
+            unlocks, scans, writes = [], [], []
+            for n in range(repeat):
+                store = PasswordVault(path, workers=workers)
+                elapsed, ok = timed(lambda: store.unlock_vault(MASTER_PASSWORD))
+                assert ok
+                unlocks.append(elapsed)
+
+                elapsed, found = timed(store.get_passwords)
+                assert len(found) == count
+                scans.append(elapsed)
+
+                elapsed, ok = timed(lambda: store.update_password(n + 1, notes=f"изменено {n}"))
+                assert ok
+                writes.append(elapsed)
+                store.lock_vault()
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+        scan = statistics.median(scans)
+        if baseline is None:
+            baseline = scan
+        print(f"{shards:>7} {statistics.median(unlocks):11.3f} {scan:9.3f} "
+              f"{statistics.median(writes):9.3f} {baseline / scan:10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк хранилища с шардами")
+    parser.add_argument('--count', type=int, default=100000)
+    parser.add_argument('--shards', type=int, nargs='+', default=[0, 1, 2, 4, 8, 16])
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"CPU: {os.cpu_count()}, записей: {args.count}")
+    run(args.count, args.shards, args.workers, args.repeat)
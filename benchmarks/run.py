@@ -0,0 +1,230 @@
+"""
+Набор бенчмарков генератора, проверки сложности и хранилища.
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --output new.json --compare baseline.json
+    python benchmarks/run.py --results new.json --compare baseline.json
+
+Время каждого замера - медиана по нескольким повторам, входные данные
+для проверки сложности строятся из фиксированного зерна, поэтому запуски
+на одной машине сравнимы между собой.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from generator import PasswordGenerator, get_policy
+import utils
+
+SEED = 1234
+LENGTHS = (8, 16, 32)
+POLICIES = {
+    "full": (True, True, True, True, False),
+    "alnum": (True, True, True, False, False),
+    "no_ambiguous": (True, True, True, True, True),
+}
+VAULT_SIZES = (100, 10000, 100000)
+
+
+def measure(func, number=1, repeat=5):
+    """Медиана времени одного вызова func по repeat замерам"""
+    func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+    return statistics.median(times)
+
+
+def sample_passwords(count=2000):
+    """Воспроизводимый набор паролей для проверки сложности"""
+    rng = random.Random(SEED)
+    alphabet = PasswordGenerator.LOWERCASE + PasswordGenerator.UPPERCASE + \
+        PasswordGenerator.DIGITS + PasswordGenerator.SYMBOLS
+    return [''.join(rng.choice(alphabet) for _ in range(rng.randint(6, 32)))
+            for _ in range(count)]
+
+
+def bench_generator(results):
+    """Одиночная и пакетная генерация для разных длин и политик"""
+    gen = PasswordGenerator()
+    for name, flags in POLICIES.items():
+        policy = get_policy(*flags)
+        for length in LENGTHS:
+            results[f"generate_password/{name}/{length}"] = measure(
+                lambda: gen.generate_password(length, policy=policy), number=2000)
+            batch = 10000
+            results[f"generate_batch/{name}/{length}"] = measure(
+                lambda: gen.generate_batch(batch, length, policy=policy)) / batch
+
+
+def bench_strength(results):
+    """Проверка сложности и расчет энтропии на один пароль"""
+    gen = PasswordGenerator()
+    passwords = sample_passwords()
+
+    def check_all():
+        for password in passwords:
+            gen.check_strength(password)
+
+    def entropy_all():
+        for password in passwords:
+            utils.calculate_entropy(password)
+
+    results["check_strength"] = measure(check_all) / len(passwords)
+    results["check_strength_many"] = measure(
+        lambda: gen.check_strength_many(passwords, feedback=False)) / len(passwords)
+    results["calculate_entropy"] = measure(entropy_all) / len(passwords)
+    results["calculate_entropy_many"] = measure(
+        lambda: utils.calculate_entropy_many(passwords)) / len(passwords)
+
+
+def make_entries(count):
+    """Записи хранилища с воспроизводимым содержимым"""
+    rng = random.Random(SEED)
+    return [{
+        'id': i + 1,
+        'service': f"service-{rng.randrange(10 ** 6)}.example.com",
+        'username': f"user{rng.randrange(10 ** 6)}@example.com",
+        'password': ''.join(rng.choice(PasswordGenerator.LOWERCASE) for _ in range(16)),
+        'notes': "",
+        'created_at': "2026-01-01 12:00",
+        'updated_at': "2026-01-01 12:00"
+    } for i in range(count)]
+
+
+def bench_vault(results, sizes):
+    """Задержка операций хранилища при разном числе записей"""
+    from vault import PasswordVault
+
+    for size in sizes:
+        for journal in (False, True):
+            prefix = "vault/journal" if journal else "vault"
+            repeat = 3 if size >= 10000 else 5
+            with tempfile.TemporaryDirectory() as tmp:
+                vault = PasswordVault(os.path.join(tmp, 'vault.dat'), journal=journal)
+                vault.create_vault("benchmark-master-password")
+                vault.save_passwords(make_entries(size))
+                target = size // 2
+
+                results[f"{prefix}/get_passwords/{size}"] = measure(
+                    vault.get_passwords, repeat=repeat)
+                results[f"{prefix}/get_password/{size}"] = measure(
+                    lambda: vault.get_password(target), number=100, repeat=repeat)
+                results[f"{prefix}/add_password/{size}"] = measure(
+                    lambda: vault.add_password("bench", "user", "secret"), repeat=repeat)
+                results[f"{prefix}/search/{size}"] = measure(
+                    lambda: vault.search("service-12", mode='prefix'), number=100, repeat=repeat)
+                results[f"{prefix}/update_password/{size}"] = measure(
+                    lambda: vault.update_password(target, notes="updated"), repeat=repeat)
+
+                ids = iter(range(1, size + 1))
+                results[f"{prefix}/delete_password/{size}"] = measure(
+                    lambda: vault.delete_password(next(ids)), repeat=repeat)
+
+                # Пакет добавляет по 1000 записей за вызов, поэтому он идет
+                # последним: остальные замеры выполняются на хранилище
+                # из size записей, как указано в их имени
+                batch = [{'service': "bench", 'username': "user", 'password': "secret"}] * 1000
+                results[f"{prefix}/add_many/{size}"] = measure(
+                    lambda: vault.add_many(batch), repeat=repeat) / len(batch)
+
+
+def run(groups, sizes):
+    """Запуск выбранных групп бенчмарков"""
+    results = {}
+    if "generator" in groups:
+        bench_generator(results)
+    if "strength" in groups:
+        bench_strength(results)
+    if "vault" in groups:
+        bench_vault(results, sizes)
+
+    return {
+        "meta": {
+            "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": {name: {"seconds": value} for name, value in results.items()},
+    }
+
+
+def compare(current, baseline, threshold):
+    """
+    Сравнение с базовой линией; возвращает список регрессий
+    """
+    regressions = []
+    print(f"\n{'бенчмарк':<40} {'база, мкс':>12} {'сейчас, мкс':>12} {'изм.':>8}")
+    for name, entry in sorted(current["results"].items()):
+        if name not in baseline["results"]:
+            continue
+        old = baseline["results"][name]["seconds"]
+        new = entry["seconds"]
+        change = (new - old) / old if old else 0.0
+        flag = ""
+        if change > threshold:
+            flag = " ← регрессия"
+            regressions.append(name)
+        print(f"{name:<40} {old * 1e6:12.2f} {new * 1e6:12.2f} {change:+8.1%}{flag}")
+    return regressions
+
+
+def print_results(report):
+    """Вывод результатов в виде таблицы"""
+    print(f"\n{'бенчмарк':<40} {'мкс/оп':>12} {'оп/с':>14}")
+    for name, entry in report["results"].items():
+        seconds = entry["seconds"]
+        print(f"{name:<40} {seconds * 1e6:12.2f} {1 / seconds if seconds else 0:14.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки генератора паролей")
+    parser.add_argument('--output', '-o', help='Сохранить результаты в JSON')
+    parser.add_argument('--compare', '-c', help='Базовая линия для сравнения (JSON)')
+    parser.add_argument('--results', '-r', help='Взять результаты из файла вместо запуска')
+    parser.add_argument('--threshold', '-t', type=float, default=0.10,
+                        help='Допустимое замедление (по умолчанию: 0.10 = 10%%)')
+    parser.add_argument('--only', nargs='+', default=["generator", "strength", "vault"],
+                        choices=["generator", "strength", "vault"],
+                        help='Группы бенчмарков')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(VAULT_SIZES),
+                        help='Размеры хранилища для замеров')
+    args = parser.parse_args()
+
+    if args.results:
+        with open(args.results) as f:
+            report = json.load(f)
+    else:
+        report = run(args.only, args.sizes)
+        print_results(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nРезультаты сохранены: {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ Регрессий: {len(regressions)} (порог {args.threshold:.0%})")
+            sys.exit(1)
+        print("\n✅ Регрессий нет")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import asyncio
+import functools
+from concurrent.futures import Executor
+from typing import AsyncIterator, Dict, List, Optional
+
+from vault import PasswordVault, derive_key
+
+
+class AsyncPasswordVault:
+    """
+    Асинхронная обертка над PasswordVault для встраивания в сервисы на
+    asyncio:
+
+        store = AsyncPasswordVault('data/vault.dat')
+        if await store.unlock(master_password):
+            entry = await store.get(5)
+            async for entry in store.iter_entries():
+                ...
+
+    Расшифровка и работа с файлом выполняются в executor (по умолчанию -
+    пул потоков цикла событий), так что цикл не останавливается.
+    Вычисление ключа (100 тысяч итераций PBKDF2) идет в kdf_executor,
+    которым может быть и ProcessPoolExecutor. Одновременные одинаковые
+    запросы на чтение объединяются: пока запрос выполняется, остальные
+    ждут его результат, а не расшифровывают те же данные заново. Разные
+    чтения выполняются параллельно: блокировка хранилища держится только
+    на время копирования токенов из файла, а расшифровка идет без нее.
+    """
+
+    def __init__(self, vault_file: str = 'data/vault.dat', executor: Optional[Executor] = None,
+                 kdf_executor: Optional[Executor] = None, vault: Optional[PasswordVault] = None,
+                 **options):
+        self.vault = vault or PasswordVault(vault_file, **options)
+        self.executor = executor
+        self.kdf_executor = kdf_executor or executor
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+
+    @property
+    def unlocked(self) -> bool:
+        """Разблокировано ли хранилище"""
+        return self.vault.unlocked
+
+    async def _run(self, func, *args, executor: Optional[Executor] = None, **kwargs):
+        """
+        Вызов func в executor без блокировки цикла событий
+        """
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args, **kwargs)
+        return await loop.run_in_executor(executor or self.executor, call)
+
+    async def _shared(self, key: tuple, func, *args):
+        """
+        Выполнение запроса с объединением одновременных одинаковых
+        запросов: все вызовы с тем же key получают результат одного
+        выполнения. func - функция для executor или корутина. Отмена
+        одного ожидающего не отменяет запрос для остальных
+        """
+        future = self._inflight.get(key)
+        if future is None:
+            if asyncio.iscoroutinefunction(func):
+                future = asyncio.ensure_future(func(*args))
+            else:
+                future = asyncio.ensure_future(self._run(func, *args))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def unlock(self, master_password: str) -> bool:
+        """
+        Разблокировка: ключ вычисляется в kdf_executor, проверка и чтение
+        заголовка - в executor
+        """
+        return await self._shared(('unlock', master_password), self._unlock, master_password)
+
+    async def _unlock(self, master_password: str) -> bool:
+        """Разблокировка по шагам в разных пулах"""
+        params = await self._run(self.vault.kdf_params)
+        if params is None:
+            return False
+        try:
+            key = await self._run(derive_key, master_password, *params, executor=self.kdf_executor)
+        except Exception:
+            return False
+        return await self._run(self.vault.unlock_with_key, key)
+
+    async def create(self, master_password: str) -> bool:
+        """
+        Создание нового хранилища
+        """
+        return await self._run(self.vault.create_vault, master_password)
+
+    async def lock(self):
+        """
+        Блокировка хранилища
+        """
+        await self._run(self.vault.lock_vault)
+
+    async def get(self, password_id: int) -> Optional[Dict]:
+        """
+        Одна запись по id (None, если ее нет)
+        """
+        entry = await self._shared(('get', password_id), self.vault.get_password, password_id)
+        return dict(entry) if entry is not None else None
+
+    async def get_all(self) -> List[Dict]:
+        """
+        Все записи
+        """
+        entries = await self._shared(('all',), self.vault.get_passwords)
+        return [dict(entry) for entry in entries]
+
+    async def search(self, query: str, field: Optional[str] = None, mode: str = 'substring',
+                     limit: int = 50) -> List[Dict]:
+        """
+        Поиск по сервису, логину и заметкам (см. PasswordVault.search)
+        """
+        entries = await self._shared(('search', query, field, mode, limit), self.vault.search,
+                                     query, field, mode, limit)
+        return [dict(entry) for entry in entries]
+
+    async def iter_entries(self, chunk_size: int = 1000) -> AsyncIterator[Dict]:
+        """
+        Все записи по одной; из файла они читаются и расшифровываются
+        порциями по chunk_size в executor
+        """
+        chunks = self.vault.iter_passwords(chunk_size)
+        try:
+            while True:
+                chunk = await self._run(next, chunks, None)
+                if chunk is None:
+                    return
+                for entry in chunk:
+                    yield entry
+        finally:
+            # При отмене порция может еще читаться в executor, тогда
+            # генератор закроется сам после нее
+            try:
+                chunks.close()
+            except ValueError:
+                pass
+
+    async def add(self, service: str, username: str, password: str, notes: str = "") -> bool:
+        """
+        Добавление нового пароля
+        """
+        return await self._run(self.vault.add_password, service, username, password, notes)
+
+    async def add_many(self, entries: List[Dict]) -> bool:
+        """
+        Добавление многих паролей одной транзакцией
+        """
+        return await self._run(self.vault.add_many, entries)
+
+    async def update(self, password_id: int, **fields) -> bool:
+        """
+        Обновление пароля
+        """
+        return await self._run(self.vault.update_password, password_id, **fields)
+
+    async def delete(self, password_id: int) -> bool:
+        """
+        Удаление пароля
+        """
+        return await self._run(self.vault.delete_password, password_id)
@@ -0,0 +1,101 @@
+import lzma
+import zlib
+from typing import Callable, Dict, NamedTuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Предустановленный словарь: записи хранилища - короткие JSON-объекты
+# с одними и теми же ключами, и без словаря сжимать по отдельности почти
+# нечего. Строки, которые встретятся в записи с наибольшей вероятностью,
+# стоят в конце словаря - на них ссылки короче
+ZDICT = (
+    b'.com.org.netgmail.com@mail.comhttps://www.example'
+    b'{"id": 1, "service": "", "username": "", "password": "", "notes": "", '
+    b'"created_at": "2026-01-01 00:00", "updated_at": "2026-01-01 00:00"}'
+    b', "notes": "", "created_at": "20'
+)
+
+
+class Codec(NamedTuple):
+    """Алгоритм сжатия данных хранилища перед шифрованием"""
+    id: int
+    name: str
+    compress: Callable[[bytes], bytes]
+    decompress: Callable[[bytes], bytes]
+
+
+# Окно в 1 КиБ вмещает словарь и запись целиком, а подготовка маленького
+# окна заметно дешевле стандартного в 32 КиБ при сжатии каждой записи
+_ZLIB_WBITS = 10
+
+
+def _zlib_compress(data: bytes) -> bytes:
+    """Сжатие zlib без заголовка со словарем ZDICT"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -_ZLIB_WBITS, 4, zdict=ZDICT)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _zlib_decompress(data: bytes) -> bytes:
+    """Обратное преобразование к _zlib_compress"""
+    decompressor = zlib.decompressobj(-_ZLIB_WBITS, zdict=ZDICT)
+    return decompressor.decompress(data) + decompressor.flush()
+
+
+def _lzma_compress(data: bytes) -> bytes:
+    """Сжатие lzma в формате raw с минимальным заголовком"""
+    return lzma.compress(data, format=lzma.FORMAT_RAW, filters=_LZMA_FILTERS)
+
+
+def _lzma_decompress(data: bytes) -> bytes:
+    """Обратное преобразование к _lzma_compress"""
+    return lzma.decompress(data, format=lzma.FORMAT_RAW, filters=_LZMA_FILTERS)
+
+
+_LZMA_FILTERS = [{'id': lzma.FILTER_LZMA2, 'preset': 6, 'dict_size': 1 << 16}]
+
+NONE = Codec(0, 'none', bytes, bytes)
+ZLIB = Codec(1, 'zlib', _zlib_compress, _zlib_decompress)
+LZMA = Codec(2, 'lzma', _lzma_compress, _lzma_decompress)
+
+CODECS: Dict[int, Codec] = {codec.id: codec for codec in (NONE, ZLIB, LZMA)}
+
+if zstandard is not None:
+    _ZSTD_DICT = zstandard.ZstdCompressionDict(ZDICT, dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+    _zstd_compressor = zstandard.ZstdCompressor(level=3, dict_data=_ZSTD_DICT,
+                                                write_content_size=False, write_checksum=False)
+    _zstd_decompressor = zstandard.ZstdDecompressor(dict_data=_ZSTD_DICT)
+
+    def _zstd_decompress(data: bytes) -> bytes:
+        """Распаковка zstd без записанного размера содержимого"""
+        return _zstd_decompressor.decompressobj().decompress(data)
+
+    ZSTD = Codec(3, 'zstd', _zstd_compressor.compress, _zstd_decompress)
+    CODECS[ZSTD.id] = ZSTD
+
+# Выбран по benchmarks/bench_compression.py: zlib со словарем сжимает
+# записи в 2,5 раза, но время загрузки определяет расшифровка, а не
+# чтение файла, и сжатие окупается только на дисках медленнее ~50 МБ/с;
+# lzma на коротких данных проигрывает zlib и по размеру, и по скорости
+DEFAULT = NONE.id
+
+
+def get_codec(codec: int) -> Codec:
+    """
+    Алгоритм сжатия по номеру из заголовка хранилища
+    """
+    if codec not in CODECS:
+        raise ValueError(f"Алгоритм сжатия {codec} недоступен")
+    return CODECS[codec]
+
+
+def codec_by_name(name: str) -> Codec:
+    """
+    Алгоритм сжатия по имени
+    """
+    for codec in CODECS.values():
+        if codec.name == name:
+            return codec
+    raise ValueError(f"Алгоритм сжатия {name} недоступен")
@@ -0,0 +1,106 @@
+import os
+import threading
+from functools import lru_cache
+from typing import MutableSequence, Sequence
+
+
+class EntropyPool:
+    """Буферизованный пул криптостойких случайных байтов"""
+
+    BLOCK_SIZE = 64 * 1024
+
+    def __init__(self, block_size: int = BLOCK_SIZE):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._buffer = b''
+        self._pos = 0
+
+        # Дочерний процесс не должен выдавать те же байты, что и родитель
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        """Сброс буфера (после fork)"""
+        self._lock = threading.Lock()
+        self._buffer = b''
+        self._pos = 0
+
+    def randbytes(self, n: int) -> bytes:
+        """
+        n случайных байтов; крупные запросы идут напрямую в os.urandom
+        """
+        if n >= self.block_size:
+            return os.urandom(n)
+
+        with self._lock:
+            if self._pos + n > len(self._buffer):
+                self._buffer = os.urandom(self.block_size)
+                self._pos = 0
+            chunk = self._buffer[self._pos:self._pos + n]
+            self._pos += n
+        return chunk
+
+    def randbelow(self, n: int) -> int:
+        """
+        Равномерное целое из [0, n) без смещения (отбор с отказом)
+        """
+        if n <= 0:
+            raise ValueError("n должно быть положительным")
+
+        bits = (n - 1).bit_length()
+        size = (bits + 7) // 8
+        mask = (1 << bits) - 1
+        while True:
+            value = int.from_bytes(self.randbytes(size), 'little') & mask
+            if value < n:
+                return value
+
+    def randint(self, a: int, b: int) -> int:
+        """
+        Равномерное целое из [a, b]
+        """
+        return a + self.randbelow(b - a + 1)
+
+    def choice(self, seq: Sequence):
+        """
+        Случайный элемент последовательности
+        """
+        return seq[self.randbelow(len(seq))]
+
+    def choices(self, alphabet: str, k: int) -> str:
+        """
+        Строка из k независимых равномерных символов алфавита (до 256 символов)
+        """
+        table, rejected, limit = translation_table(alphabet)
+        out = b''
+        while len(out) < k:
+            raw = self.randbytes((k - len(out)) * 256 // limit + 8)
+            out += raw.translate(table, rejected)
+        return out[:k].decode('latin-1')
+
+    def shuffle(self, items: MutableSequence):
+        """
+        Перемешивание на месте (Фишер-Йетс)
+        """
+        for i in range(len(items) - 1, 0, -1):
+            j = self.randbelow(i + 1)
+            items[i], items[j] = items[j], items[i]
+
+
+@lru_cache(maxsize=64)
+def translation_table(alphabet: str) -> tuple:
+    """
+    Таблица bytes.translate для отображения случайных байтов в символы
+    алфавита (до 256 символов) без смещения распределения: байты не ниже
+    limit отбрасываются (второй элемент - их список для translate), а
+    остальные переводятся в символы по модулю размера алфавита.
+    Возвращает (таблица, отбрасываемые байты, limit)
+    """
+    encoded = alphabet.encode('latin-1')
+    size = len(encoded)
+    limit = 256 - 256 % size
+    table = bytes(encoded[i % size] for i in range(256))
+    return table, bytes(range(limit, 256)), limit
+
+
+pool = EntropyPool()
@@ -1,6 +1,62 @@
-import random
+import json
 import string
-from typing import Optional
+from array import array
+from functools import lru_cache
+from itertools import compress
+from math import log2
+from typing import Iterator, List, Optional, TextIO
+
+from entropy import pool, translation_table
+
+
+class CharsetPolicy:
+    """Скомпилированный набор символов для комбинации флагов генератора"""
+
+    def __init__(self, classes: tuple, required: tuple):
+        self.classes = classes
+        self.required = required
+        self.alphabet = ''.join(classes)
+        self.size = len(self.alphabet)
+
+        self.table, self.rejected, self.limit = translation_table(self.alphabet)
+
+        class_bits = bytearray(256)
+        for bit, chars in enumerate(required):
+            for c in chars.encode('ascii'):
+                class_bits[c] = 1 << bit
+        self.class_bits = bytes(class_bits)
+        full_mask = (1 << len(required)) - 1
+        self.accept = bytes(m == full_mask for m in range(256))
+        self._entropy = {}
+
+    def accepts(self, password: str) -> bool:
+        """
+        Есть ли в пароле символ из каждого обязательного набора
+        """
+        mask = 0
+        for bits in set(password.encode('ascii').translate(self.class_bits)):
+            mask |= bits
+        return bool(self.accept[mask])
+
+    def entropy(self, length: int) -> float:
+        """
+        Точная энтропия (бит) пароля длины length, равномерного среди
+        допустимых: log2 их числа по формуле включений-исключений
+        """
+        bits = self._entropy.get(length)
+        if bits is None:
+            sizes = [len(chars) for chars in self.required]
+            count = 0
+            for subset in range(1 << len(sizes)):
+                excluded = sum(size for i, size in enumerate(sizes) if subset >> i & 1)
+                sign = -1 if bin(subset).count('1') % 2 else 1
+                count += sign * (self.size - excluded) ** length
+            bits = log2(count) if count > 0 else 0.0
+            self._entropy[length] = bits
+        return bits
+
+    def __repr__(self):
+        return f"CharsetPolicy(alphabet={self.alphabet!r}, required={len(self.required)})"
 
 
 class PasswordGenerator:
@@ -46,53 +102,131 @@ class PasswordGenerator:
         }
     }
 
+    # Размер порции при потоковой генерации: около 64 КиБ вывода,
+    # что совпадает с буфером канала и не раздувает память
+    STREAM_CHUNK_BYTES = 64 * 1024
+
     def __init__(self):
         self.current_password = None
 
     def generate_password(self, length: int, use_lowercase: bool = True,
                           use_uppercase: bool = True, use_digits: bool = True,
-                          use_symbols: bool = True, exclude_ambiguous: bool = False) -> str:
+                          use_symbols: bool = True, exclude_ambiguous: bool = False,
+                          policy: Optional[CharsetPolicy] = None) -> str:
         """
         Генерация пароля с заданными параметрами
         """
         if length < 4:
             length = 4
 
-        chars = ""
-        if use_lowercase:
-            chars += self.LOWERCASE
-        if use_uppercase:
-            chars += self.UPPERCASE
-        if use_digits:
-            chars += self.DIGITS
-        if use_symbols:
-            chars += self.SYMBOLS
+        if policy is None:
+            policy = get_policy(use_lowercase, use_uppercase, use_digits,
+                                use_symbols, exclude_ambiguous)
+
+        # Пароль без символа из какого-либо обязательного набора отбрасывается
+        # целиком: распределение равномерно среди допустимых паролей, и его
+        # энтропия в точности равна policy.entropy(length)
+        password = pool.choices(policy.alphabet, length)
+        while not policy.accepts(password):
+            password = pool.choices(policy.alphabet, length)
+
+        self.current_password = password
+        return self.current_password
+
+    def generate_batch(self, n: int, length: int, use_lowercase: bool = True,
+                       use_uppercase: bool = True, use_digits: bool = True,
+                       use_symbols: bool = True, exclude_ambiguous: bool = False,
+                       policy: Optional[CharsetPolicy] = None) -> List[str]:
+        """
+        Пакетная генерация n паролей одинаковой длины.
+
+        Случайные байты берутся одним блоком из пула энтропии и переводятся в
+        символы через bytes.translate: байты выше кратного размеру алфавита
+        порога отбрасываются, поэтому распределение равномерное. Пароли без
+        хотя бы одного символа из каждого выбранного набора отбрасываются
+        целиком, так что результат равномерен среди всех допустимых паролей.
+        """
+        if n <= 0:
+            return []
+        if length < 4:
+            length = 4
+
+        if policy is None:
+            policy = get_policy(use_lowercase, use_uppercase, use_digits,
+                                use_symbols, exclude_ambiguous)
 
-        if not chars:
-            chars = self.LOWERCASE + self.DIGITS
+        passwords = []
+        drawn = accepted = 0
+        while len(passwords) < n:
+            # Доля принятых кандидатов задает запас для следующего раунда
+            rate = accepted / drawn if accepted else 1.0
+            need = int((n - len(passwords)) / rate * 1.1 + 1) * length
+            data = bytearray()
+            while len(data) < need:
+                raw = pool.randbytes((need - len(data)) * 256 // policy.limit + 64)
+                data += raw.translate(policy.table, policy.rejected)
+            del data[need:]
 
-        if exclude_ambiguous:
-            ambiguous = "Il1O0"
-            chars = ''.join(c for c in chars if c not in ambiguous)
+            text = data.decode('ascii')
+            masks = _window_masks(data.translate(policy.class_bits), length)
+            starts = compress(range(0, need, length), masks.translate(policy.accept))
+            before = len(passwords)
+            passwords.extend(text[i:i + length] for i in starts)
+            drawn += need // length
+            accepted += len(passwords) - before
 
-        password = []
+        del passwords[n:]
+        return passwords
 
-        if use_lowercase:
-            password.append(random.choice(self.LOWERCASE))
-        if use_uppercase:
-            password.append(random.choice(self.UPPERCASE))
-        if use_digits:
-            password.append(random.choice(self.DIGITS))
-        if use_symbols:
-            password.append(random.choice(self.SYMBOLS))
+    def iter_passwords(self, count: Optional[int] = None, length: int = 16,
+                       policy: Optional[CharsetPolicy] = None,
+                       chunk_size: Optional[int] = None) -> Iterator[str]:
+        """
+        Ленивая генерация паролей порциями (count=None - бесконечно)
+        """
+        for chunk in self._iter_chunks(count, length, policy, chunk_size):
+            yield from chunk
 
-        for _ in range(length - len(password)):
-            password.append(random.choice(chars))
+    def write_passwords(self, stream: TextIO, count: int, length: int = 16,
+                        policy: Optional[CharsetPolicy] = None, fmt: str = "text",
+                        chunk_size: Optional[int] = None) -> int:
+        """
+        Потоковая запись паролей в файл построчно ("text") или в JSONL ("jsonl")
+        """
+        if fmt not in ("text", "jsonl"):
+            raise ValueError(f"Неизвестный формат: {fmt}")
 
-        random.shuffle(password)
+        written = 0
+        for chunk in self._iter_chunks(count, length, policy, chunk_size):
+            if fmt == "jsonl":
+                lines = [f'{{"password": {json.dumps(p)}}}' for p in chunk]
+            else:
+                lines = chunk
+            stream.write('\n'.join(lines) + '\n')
+            # Запись каждой порции сразу уходит в файл или канал: медленный
+            # читатель блокирует запись и тем самым притормаживает генерацию
+            stream.flush()
+            written += len(chunk)
+        return written
 
-        self.current_password = ''.join(password)
-        return self.current_password
+    def _iter_chunks(self, count: Optional[int], length: int,
+                     policy: Optional[CharsetPolicy], chunk_size: Optional[int]) -> Iterator[List[str]]:
+        """
+        Порции паролей для потоковой генерации
+        """
+        if policy is None:
+            policy = get_policy()
+        if length < 4:
+            length = 4
+        if chunk_size is None:
+            chunk_size = max(1, self.STREAM_CHUNK_BYTES // (length + 1))
+
+        remaining = count
+        while remaining is None or remaining > 0:
+            n = chunk_size if remaining is None else min(chunk_size, remaining)
+            yield self.generate_batch(n, length, policy=policy)
+            if remaining is not None:
+                remaining -= n
 
     def generate_by_level(self, level: str, length: Optional[int] = None) -> str:
         """
@@ -104,75 +238,180 @@ class PasswordGenerator:
         config = self.LEVELS[level]
 
         if length is None:
-            length = random.randint(config["min_length"], config["max_length"])
+            length = pool.randint(config["min_length"], config["max_length"])
 
-        return self.generate_password(
-            length=length,
-            use_lowercase=config["lowercase"],
-            use_uppercase=config["uppercase"],
-            use_digits=config["digits"],
-            use_symbols=config["symbols"]
-        )
+        policy = get_policy(config["lowercase"], config["uppercase"],
+                            config["digits"], config["symbols"], False)
+        return self.generate_password(length=length, policy=policy)
 
     def check_strength(self, password: str) -> tuple:
         """
         Проверка сложности пароля
         """
+        unique = set(password)
+        mask = class_mask(password)
+        score = _strength_score(len(password), mask, len(unique))
+        feedback = _strength_feedback(len(password), mask, len(unique))
+        rating, color = strength_rating(score)
+        return rating, feedback, color, score
+
+    def check_strength_many(self, passwords, feedback: bool = True):
+        """
+        Проверка сложности списка паролей.
+
+        С feedback=False возвращает компактный array('B') с баллами без
+        построения списков замечаний; рейтинг по баллу дает strength_rating.
+        """
+        if feedback:
+            return [self.check_strength(password) for password in passwords]
+        return array('B', [_strength_score(len(password), class_mask(password), len(set(password)))
+                           for password in passwords])
+
+
+@lru_cache(maxsize=32)
+def get_policy(use_lowercase: bool = True, use_uppercase: bool = True,
+               use_digits: bool = True, use_symbols: bool = True,
+               exclude_ambiguous: bool = False) -> CharsetPolicy:
+    """
+    Скомпилированная политика для комбинации флагов (с кэшированием)
+    """
+    classes = []
+    if use_lowercase:
+        classes.append(PasswordGenerator.LOWERCASE)
+    if use_uppercase:
+        classes.append(PasswordGenerator.UPPERCASE)
+    if use_digits:
+        classes.append(PasswordGenerator.DIGITS)
+    if use_symbols:
+        classes.append(PasswordGenerator.SYMBOLS)
+
+    required = classes
+    if not classes:
+        classes = [PasswordGenerator.LOWERCASE, PasswordGenerator.DIGITS]
+
+    if exclude_ambiguous:
+        ambiguous = "Il1O0"
+        classes = [''.join(c for c in chars if c not in ambiguous) for chars in classes]
+        required = classes if required else []
+
+    return CharsetPolicy(tuple(classes), tuple(required))
+
+
+LOWER, UPPER, DIGIT, SYMBOL = 1, 2, 4, 8
+
+
+def classify(c: str, symbols: str = PasswordGenerator.SYMBOLS) -> int:
+    """
+    Битовая маска классов одного символа; спецсимволами считаются symbols
+    """
+    return ((LOWER if c.islower() else 0) | (UPPER if c.isupper() else 0) |
+            (DIGIT if c.isdigit() else 0) | (SYMBOL if c in symbols else 0))
+
+
+@lru_cache(maxsize=None)
+def class_table(symbols: str = PasswordGenerator.SYMBOLS) -> bytes:
+    """
+    Классы всех символов Latin-1 для bytes.translate
+    """
+    return bytes(classify(chr(i), symbols) for i in range(256))
+
+
+def class_mask(password: str, symbols: str = PasswordGenerator.SYMBOLS) -> int:
+    """
+    Объединение классов символов пароля за один проход по таблице
+    """
+    try:
+        classes = set(password.encode('latin-1').translate(class_table(symbols)))
+    except UnicodeEncodeError:
+        classes = {classify(c, symbols) for c in password}
+
+    mask = 0
+    for bits in classes:
+        mask |= bits
+    return mask
+
+
+def _strength_score(length: int, mask: int, unique: int) -> int:
+    """
+    Балл сложности по длине, классам символов и разнообразию
+    """
+    if length >= 16:
+        score = 3
+    elif length >= 12:
+        score = 2
+    elif length >= 8:
+        score = 1
+    else:
         score = 0
-        feedback = []
-
-        if len(password) >= 16:
-            score += 3
-            feedback.append("✓ Отличная длина")
-        elif len(password) >= 12:
-            score += 2
-            feedback.append("✓ Хорошая длина")
-        elif len(password) >= 8:
-            score += 1
-            feedback.append("✓ Достаточная длина")
-        else:
-            feedback.append("✗ Слишком короткий")
-
-        if any(c.islower() for c in password):
-            score += 1
-        else:
-            feedback.append("✗ Нет строчных букв")
-
-        if any(c.isupper() for c in password):
-            score += 1
-        else:
-            feedback.append("✗ Нет заглавных букв")
-
-        if any(c.isdigit() for c in password):
-            score += 1
-        else:
-            feedback.append("✗ Нет цифр")
-
-        if any(c in self.SYMBOLS for c in password):
-            score += 2
-            feedback.append("✓ Есть спецсимволы")
-        else:
-            feedback.append("✗ Нет спецсимволов")
-
-        unique_chars = len(set(password))
-        if unique_chars > len(password) * 0.7:
-            score += 1
-            feedback.append("✓ Хорошее разнообразие")
-
-        if score >= 7:
-            rating = "Очень надежный"
-            color = "#4CAF50"
-        elif score >= 5:
-            rating = "Надежный"
-            color = "#2196F3"
-        elif score >= 3:
-            rating = "Средний"
-            color = "#FF9800"
-        else:
-            rating = "Слабый"
-            color = "#f44336"
 
-        return rating, feedback, color, score
+    score += bool(mask & LOWER) + bool(mask & UPPER) + bool(mask & DIGIT)
+    if mask & SYMBOL:
+        score += 2
+    if unique > length * 0.7:
+        score += 1
+    return score
+
+
+def _strength_feedback(length: int, mask: int, unique: int) -> list:
+    """
+    Замечания к паролю в порядке проверок
+    """
+    feedback = []
+
+    if length >= 16:
+        feedback.append("✓ Отличная длина")
+    elif length >= 12:
+        feedback.append("✓ Хорошая длина")
+    elif length >= 8:
+        feedback.append("✓ Достаточная длина")
+    else:
+        feedback.append("✗ Слишком короткий")
+
+    if not mask & LOWER:
+        feedback.append("✗ Нет строчных букв")
+    if not mask & UPPER:
+        feedback.append("✗ Нет заглавных букв")
+    if not mask & DIGIT:
+        feedback.append("✗ Нет цифр")
+
+    if mask & SYMBOL:
+        feedback.append("✓ Есть спецсимволы")
+    else:
+        feedback.append("✗ Нет спецсимволов")
+
+    if unique > length * 0.7:
+        feedback.append("✓ Хорошее разнообразие")
+    return feedback
+
+
+def strength_rating(score: int) -> tuple:
+    """
+    Рейтинг и цвет по баллу сложности
+    """
+    if score >= 7:
+        return "Очень надежный", "#4CAF50"
+    elif score >= 5:
+        return "Надежный", "#2196F3"
+    elif score >= 3:
+        return "Средний", "#FF9800"
+    return "Слабый", "#f44336"
+
+
+def _window_masks(classes: bytes, length: int) -> bytes:
+    """
+    Побитовое ИЛИ масок классов внутри каждого пароля длины length.
+
+    Буфер масок читается как одно большое целое, и окна складываются
+    сдвигами с удвоением ширины, поэтому вся работа идет в C-коде.
+    """
+    total = int.from_bytes(classes, 'little')
+    width = 1
+    while width * 2 <= length:
+        total |= total >> (8 * width)
+        width *= 2
+    if width < length:
+        total |= total >> (8 * (length - width))
+    return total.to_bytes(len(classes), 'little')[::length]
 
 
 generator = PasswordGenerator()
\ No newline at end of file
@@ -695,6 +695,86 @@ def quick_generate():
             print("⚠️ Не удалось скопировать пароль")
 
 
+def bulk_generate(args):
+    """Массовая генерация паролей в stdout или файл"""
+    try:
+        from generator import generator, get_policy
+        from parallel import ParallelGenerator
+    except ImportError:
+        print("❌ Ошибка: Не найден модуль генератора")
+        return
+
+    count = args.count
+    options = dict(
+        length=args.length,
+        use_symbols=not args.no_symbols,
+        use_digits=not args.no_digits
+    )
+
+    stream = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        if args.workers and args.workers > 1:
+            engine = ParallelGenerator(workers=args.workers)
+            written = engine.write_passwords(stream, count, **options)
+        else:
+            policy = get_policy(True, True, options['use_digits'], options['use_symbols'], False)
+            written = generator.write_passwords(stream, count, args.length, policy=policy)
+    finally:
+        if args.output:
+            stream.close()
+
+    if args.output:
+        print(f"✅ Записано паролей: {written} → {args.output}")
+
+
+def vault_transfer(args):
+    """Импорт записей в хранилище и экспорт из него"""
+    try:
+        from vault import PasswordVault
+        from vault_io import import_records, export_records
+    except ImportError:
+        print("❌ Ошибка: Не найден модуль хранилища")
+        return
+
+    import getpass
+
+    mapping = {}
+    for item in args.map or []:
+        field, _, column = item.partition('=')
+        mapping[field] = column
+
+    try:
+        store = PasswordVault(args.vault, compression=args.compression, shards=args.shards,
+                              workers=args.workers)
+    except ValueError as e:
+        print(f"❌ Ошибка: {e}")
+        return
+    if not store.unlock_vault(getpass.getpass("🔑 Мастер-пароль: ")):
+        print("❌ Неверный мастер-пароль или хранилище не найдено")
+        return
+
+    def report(done, elapsed):
+        rate = done / elapsed if elapsed else 0
+        print(f"\r   Записей: {done}  ({rate:.0f} зап/с)", end='', flush=True)
+
+    try:
+        if args.vault_import:
+            stats = import_records(store, args.vault_import, args.format, mapping,
+                                   args.chunk_size, progress=report)
+            print(f"\n✅ Импортировано: {stats['records']}, пропущено: {stats['skipped']} "
+                  f"за {stats['seconds']:.1f} с ({stats['rate']:.0f} зап/с)")
+        else:
+            stats = export_records(store, args.vault_export, args.format, mapping,
+                                   args.chunk_size, progress=report)
+            print(f"\n✅ Экспортировано: {stats['records']} → {args.vault_export} "
+                  f"за {stats['seconds']:.1f} с ({stats['rate']:.0f} зап/с)")
+            print("⚠️ Пароли в файле экспорта не зашифрованы")
+    except Exception as e:
+        print(f"\n❌ Ошибка переноса: {e}")
+    finally:
+        store.lock_vault()
+
+
 if __name__ == "__main__":
     import argparse
 
@@ -708,6 +788,9 @@ if __name__ == "__main__":
   python main.py --length 20  # Пароль длиной 20 символов
   python main.py --no-symbols # Пароль без спецсимволов
   python main.py --copy       # Сгенерировать и скопировать
+  python main.py --count 1000000 --workers 4 --output passwords.txt
+  python main.py --vault-import team.csv --map service=url --map username=login
+  python main.py --vault-export backup.jsonl
         """
     )
 
@@ -742,6 +825,81 @@ if __name__ == "__main__":
         help='Копировать в буфер обмена'
     )
 
+    parser.add_argument(
+        '--count', '-n',
+        type=int,
+        default=None,
+        help='Сгенерировать N паролей в stdout или файл'
+    )
+
+    parser.add_argument(
+        '--workers', '-w',
+        type=int,
+        default=None,
+        help='Число процессов для массовой генерации и расшифровки шардов хранилища'
+    )
+
+    parser.add_argument(
+        '--output', '-o',
+        default=None,
+        help='Файл для массовой генерации (по умолчанию stdout)'
+    )
+
+    parser.add_argument(
+        '--vault-import',
+        metavar='FILE',
+        default=None,
+        help='Импортировать записи в хранилище из CSV или JSONL'
+    )
+
+    parser.add_argument(
+        '--vault-export',
+        metavar='FILE',
+        default=None,
+        help='Экспортировать записи хранилища в CSV или JSONL'
+    )
+
+    parser.add_argument(
+        '--vault',
+        default='data/vault.dat',
+        help='Файл хранилища (по умолчанию: data/vault.dat)'
+    )
+
+    parser.add_argument(
+        '--format',
+        choices=['csv', 'jsonl'],
+        default=None,
+        help='Формат файла импорта/экспорта (по умолчанию по расширению)'
+    )
+
+    parser.add_argument(
+        '--map',
+        action='append',
+        metavar='FIELD=COLUMN',
+        help='Колонка файла для поля хранилища (можно повторять)'
+    )
+
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=1000,
+        help='Записей в одной порции импорта/экспорта (по умолчанию: 1000)'
+    )
+
+    parser.add_argument(
+        '--compression',
+        choices=['none', 'zlib', 'lzma', 'zstd'],
+        default=None,
+        help='Сжатие записей хранилища при импорте (по умолчанию как в файле)'
+    )
+
+    parser.add_argument(
+        '--shards',
+        type=int,
+        default=None,
+        help='Число файлов-шардов хранилища при импорте (0 - один файл, по умолчанию как в файле)'
+    )
+
     parser.add_argument(
         '--version', '-v',
         action='store_true',
@@ -759,4 +917,15 @@ if __name__ == "__main__":
         quick_generate()
         sys.exit(0)
 
+    if args.vault_import or args.vault_export:
+        vault_transfer(args)
+        sys.exit(0)
+
+    if args.count:
+        bulk_generate(args)
+        sys.exit(0)
+
+    if args.workers:
+        parser.error("--workers используется вместе с --count или --vault-import/--vault-export")
+
     main()
\ No newline at end of file
@@ -0,0 +1,90 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, TextIO
+
+from generator import PasswordGenerator, get_policy
+
+
+def _generate_chunk(n: int, length: int, flags: tuple) -> str:
+    """
+    Порция паролей в процессе-исполнителе.
+
+    Пароли возвращаются одной строкой через перевод строки: одна длинная
+    строка сериализуется между процессами намного быстрее списка строк.
+    Случайность берется из пула энтропии, который после fork сбрасывает
+    буфер, поэтому у каждого процесса собственный поток байтов из
+    os.urandom, а не копия состояния родителя.
+    """
+    worker_generator = PasswordGenerator()
+    return '\n'.join(worker_generator.generate_batch(n, length, policy=get_policy(*flags)))
+
+
+class ParallelGenerator:
+    """Параллельная генерация паролей в пуле процессов"""
+
+    # Порция на один вызов исполнителя: достаточно крупная, чтобы накладные
+    # расходы на передачу между процессами были малы по сравнению с генерацией
+    CHUNK_SIZE = 50000
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: Optional[int] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
+
+    def generate(self, n: int, length: int = 16, use_lowercase: bool = True,
+                 use_uppercase: bool = True, use_digits: bool = True,
+                 use_symbols: bool = True, exclude_ambiguous: bool = False) -> List[str]:
+        """
+        Генерация n паролей с распределением работы по процессам
+        """
+        flags = (use_lowercase, use_uppercase, use_digits, use_symbols, exclude_ambiguous)
+        passwords = []
+        for chunk in self._iter_chunks(n, length, flags):
+            passwords.extend(chunk.split('\n'))
+        return passwords
+
+    def iter_passwords(self, count: int, length: int = 16, use_lowercase: bool = True,
+                       use_uppercase: bool = True, use_digits: bool = True,
+                       use_symbols: bool = True, exclude_ambiguous: bool = False) -> Iterator[str]:
+        """
+        Ленивая параллельная генерация с ограниченным числом порций в работе
+        """
+        flags = (use_lowercase, use_uppercase, use_digits, use_symbols, exclude_ambiguous)
+        for chunk in self._iter_chunks(count, length, flags):
+            yield from chunk.split('\n')
+
+    def write_passwords(self, stream: TextIO, count: int, length: int = 16,
+                        use_lowercase: bool = True, use_uppercase: bool = True,
+                        use_digits: bool = True, use_symbols: bool = True,
+                        exclude_ambiguous: bool = False) -> int:
+        """
+        Потоковая запись паролей в файл построчно
+        """
+        flags = (use_lowercase, use_uppercase, use_digits, use_symbols, exclude_ambiguous)
+        written = 0
+        for chunk in self._iter_chunks(count, length, flags):
+            stream.write(chunk + '\n')
+            stream.flush()
+            written += chunk.count('\n') + 1
+        return written
+
+    def _iter_chunks(self, count: int, length: int, flags: tuple) -> Iterator[str]:
+        """
+        Порции от исполнителей в исходном порядке; в работе не больше
+        двух порций на процесс, так что память не растет вместе с count
+        """
+        if count <= 0:
+            return
+
+        sizes = [self.chunk_size] * (count // self.chunk_size)
+        if count % self.chunk_size:
+            sizes.append(count % self.chunk_size)
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            pending = deque()
+            for size in sizes:
+                if len(pending) >= self.workers * 2:
+                    yield pending.popleft().result()
+                pending.append(pool.submit(_generate_chunk, size, length, flags))
+            while pending:
+                yield pending.popleft().result()
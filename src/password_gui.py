@@ -1,3 +1,6 @@
+import queue
+import threading
+from bisect import bisect_left, insort
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 from tkinter.font import Font
@@ -6,7 +9,152 @@ from generator import generator
 from vault import vault
 
 
+class VaultWorker:
+    """
+    Фоновый поток для операций с хранилищем: вычисление ключа,
+    расшифровка и запись не останавливают окно. Задачи выполняются по
+    одной в порядке отправки, а результаты передаются через очередь,
+    которую главный поток Tk проверяет через root.after - виджеты
+    трогаются только из главного потока
+    """
+
+    POLL_MS = 50
+
+    def __init__(self, root):
+        self.root = root
+        self.tasks = queue.Queue()
+        self.results = queue.Queue()
+        self.pending = 0
+        self.on_busy = None
+        threading.Thread(target=self._run, daemon=True).start()
+        self.root.after(self.POLL_MS, self._poll)
+
+    def submit(self, func, *args, done=None, error=None):
+        """
+        Выполнение func(*args) в фоне; done получает результат, error -
+        исключение (оба вызываются в главном потоке)
+        """
+        self.pending += 1
+        if self.pending == 1 and self.on_busy:
+            self.on_busy(True)
+        self.tasks.put((func, args, done, error))
+
+    def _run(self):
+        """Цикл фонового потока"""
+        while True:
+            func, args, done, error = self.tasks.get()
+            try:
+                self.results.put((done, func(*args), None, error))
+            except Exception as e:
+                self.results.put((done, None, e, error))
+
+    def _poll(self):
+        """
+        Обработка готовых результатов в главном потоке. Исключение в
+        обработчике показывается пользователю и не останавливает опрос
+        """
+        try:
+            while True:
+                done, result, exc, error = self.results.get_nowait()
+                self.pending -= 1
+                try:
+                    if self.pending == 0 and self.on_busy:
+                        self.on_busy(False)
+                    if exc is not None:
+                        if error:
+                            error(exc)
+                        else:
+                            messagebox.showerror("Ошибка", str(exc))
+                    elif done:
+                        done(result)
+                except Exception as e:
+                    self._report(e)
+        except queue.Empty:
+            pass
+        finally:
+            self.root.after(self.POLL_MS, self._poll)
+
+    @staticmethod
+    def _report(exc):
+        """Сообщение об ошибке в обработчике результата"""
+        try:
+            messagebox.showerror("Ошибка", str(exc))
+        except Exception:
+            print(f"Ошибка: {exc}")
+
+
+class PasswordRows:
+    """
+    Строки списка паролей: отображаемые значения по id, текущий порядок
+    и индексы сортировки. Для колонки, по которой хоть раз сортировали,
+    хранится отсортированный список (ключ, id); при обновлении строк он
+    правится только для добавленных, измененных и удаленных записей, так
+    что сортировка не требует ни повторного чтения хранилища, ни полной
+    пересортировки
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.order = []
+        self.sort_column = None
+        self.descending = False
+        self._keys = {}
+
+    @staticmethod
+    def _key(values: tuple, column: int) -> str:
+        return str(values[column]).lower()
+
+    def update(self, rows: dict) -> tuple:
+        """
+        Замена строк новым набором id -> значения; возвращает множества
+        измененных (включая новые) и удаленных id
+        """
+        removed = self.values.keys() - rows.keys()
+        changed = {i for i, values in rows.items() if self.values.get(i) != values}
+        for column, keys in list(self._keys.items()):
+            # При массовой замене проще отсортировать заново
+            if len(changed) + len(removed) > len(keys) // 4:
+                self._keys[column] = sorted((self._key(values, column), i)
+                                            for i, values in rows.items())
+                continue
+            for i in removed | changed:
+                if i in self.values:
+                    del keys[bisect_left(keys, (self._key(self.values[i], column), i))]
+            for i in changed:
+                insort(keys, (self._key(rows[i], column), i))
+        self.values = rows
+        self._reorder()
+        return changed, removed
+
+    def sort_by(self, column: int):
+        """
+        Сортировка по колонке; повторный выбор той же колонки меняет
+        направление
+        """
+        if self.sort_column == column:
+            self.descending = not self.descending
+        else:
+            self.sort_column = column
+            self.descending = False
+        if column not in self._keys:
+            self._keys[column] = sorted((self._key(values, column), i)
+                                        for i, values in self.values.items())
+        self._reorder()
+
+    def _reorder(self):
+        """Порядок id по текущей сортировке (без нее - в порядке хранилища)"""
+        if self.sort_column is None:
+            self.order = list(self.values)
+            return
+        self.order = [i for _, i in self._keys[self.sort_column]]
+        if self.descending:
+            self.order.reverse()
+
+
 class PasswordGeneratorApp:
+    # Строк списка паролей, создаваемых в Treeview сверх видимых
+    ROW_BUFFER = 10
+
     def __init__(self, root):
         self.root = root
         self.root.title("🔐 Генератор и Хранитель Паролей")
@@ -18,8 +166,20 @@ class PasswordGeneratorApp:
         self.current_password = None
         self.vault_unlocked = False
         self.master_password = None
+        self.refresh_seq = 0
+
+        # Treeview содержит только видимые строки (плюс запас): все строки
+        # хранятся в self.rows, а в дереве - окно начиная с self.view_top
+        self.rows = PasswordRows()
+        self.rendered = {}
+        self.view_top = 0
+        self.selected_id = None
+
+        self.worker = VaultWorker(self.root)
+        self.vault_buttons = []
 
         self.create_widgets()
+        self.worker.on_busy = self.set_vault_busy
 
         self.check_vault()
 
@@ -241,50 +401,97 @@ class PasswordGeneratorApp:
         button_frame = ttk.Frame(self.login_frame)
         button_frame.pack(pady=20)
 
-        ttk.Button(
+        unlock_button = ttk.Button(
             button_frame,
             text="🔓 Разблокировать",
             command=self.unlock_vault
-        ).pack(side=tk.LEFT, padx=5)
+        )
+        unlock_button.pack(side=tk.LEFT, padx=5)
 
-        ttk.Button(
+        create_button = ttk.Button(
             button_frame,
             text="🆕 Создать хранилище",
             command=self.create_vault
-        ).pack(side=tk.LEFT, padx=5)
+        )
+        create_button.pack(side=tk.LEFT, padx=5)
+        self.vault_buttons += [unlock_button, create_button]
+
+        # Строка состояния фоновых операций с хранилищем
+        status_frame = ttk.Frame(self.vault_frame)
+        status_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=5, pady=(0, 5))
+        self.vault_status_var = tk.StringVar()
+        ttk.Label(status_frame, textvariable=self.vault_status_var).pack(side=tk.LEFT)
+        self.vault_progress = ttk.Progressbar(status_frame, mode='indeterminate', length=150)
 
         self.vault_content_frame = ttk.Frame(self.vault_frame)
 
-        columns = ("Сервис", "Логин", "Пароль", "Заметки", "Создан", "Изменен")
+        search_frame = ttk.Frame(self.vault_content_frame)
+        search_frame.pack(side=tk.TOP, fill=tk.X, pady=(0, 5))
+
+        ttk.Label(search_frame, text="🔍 Поиск:").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *args: self.refresh_password_list())
+        ttk.Entry(
+            search_frame,
+            textvariable=self.search_var,
+            width=40
+        ).pack(side=tk.LEFT, padx=(10, 10))
+
+        self.search_modes = {"Подстрока": "substring", "Начало": "prefix", "Похожие": "fuzzy"}
+        self.search_mode_var = tk.StringVar(value="Подстрока")
+        search_mode = ttk.Combobox(
+            search_frame,
+            textvariable=self.search_mode_var,
+            values=list(self.search_modes),
+            state="readonly",
+            width=12
+        )
+        search_mode.pack(side=tk.LEFT)
+        search_mode.bind("<<ComboboxSelected>>", lambda e: self.refresh_password_list())
+
+        self.tree_columns = ("Сервис", "Логин", "Пароль", "Заметки", "Создан", "Изменен")
         self.password_tree = ttk.Treeview(
             self.vault_content_frame,
-            columns=columns,
+            columns=self.tree_columns,
             show="headings",
             height=15
         )
 
-        for col in columns:
-            self.password_tree.heading(col, text=col)
+        for index, col in enumerate(self.tree_columns):
+            # Пароли скрыты, сортировать по ним нечего
+            if index == 2:
+                self.password_tree.heading(col, text=col)
+            else:
+                self.password_tree.heading(
+                    col, text=col, command=lambda index=index: self.sort_password_list(index)
+                )
             self.password_tree.column(col, width=120)
 
-        scrollbar = ttk.Scrollbar(
+        # Прокрутка управляется вручную: полоса показывает положение окна
+        # во всем списке, а не в строках, созданных в дереве
+        self.tree_scrollbar = ttk.Scrollbar(
             self.vault_content_frame,
             orient=tk.VERTICAL,
-            command=self.password_tree.yview
+            command=self.scroll_password_list
         )
-        self.password_tree.configure(yscrollcommand=scrollbar.set)
+        self.password_tree.bind("<Configure>", lambda e: self.render_password_list())
+        self.password_tree.bind("<MouseWheel>", self.on_tree_wheel)
+        self.password_tree.bind("<Button-4>", self.on_tree_wheel)
+        self.password_tree.bind("<Button-5>", self.on_tree_wheel)
+        self.password_tree.bind("<<TreeviewSelect>>", self.on_tree_select)
 
         self.password_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
         control_frame = ttk.Frame(self.vault_content_frame)
         control_frame.pack(fill=tk.X, pady=10)
 
-        ttk.Button(
+        add_button = ttk.Button(
             control_frame,
             text="➕ Добавить",
             command=self.add_password_dialog
-        ).pack(side=tk.LEFT, padx=2)
+        )
+        add_button.pack(side=tk.LEFT, padx=2)
 
         ttk.Button(
             control_frame,
@@ -292,11 +499,13 @@ class PasswordGeneratorApp:
             command=self.edit_password_dialog
         ).pack(side=tk.LEFT, padx=2)
 
-        ttk.Button(
+        delete_button = ttk.Button(
             control_frame,
             text="🗑️ Удалить",
             command=self.delete_password
-        ).pack(side=tk.LEFT, padx=2)
+        )
+        delete_button.pack(side=tk.LEFT, padx=2)
+        self.vault_buttons += [add_button, delete_button]
 
         ttk.Button(
             control_frame,
@@ -437,6 +646,31 @@ class PasswordGeneratorApp:
         if not os.path.exists('data/vault.dat'):
             self.login_frame.tkraise()
 
+    def set_vault_busy(self, busy):
+        """Индикация фоновой операции с хранилищем"""
+        state = tk.DISABLED if busy else tk.NORMAL
+        for button in self.vault_buttons:
+            button.config(state=state)
+        if busy:
+            self.vault_progress.pack(side=tk.RIGHT)
+            self.vault_progress.start(10)
+            self.root.config(cursor="watch")
+        else:
+            self.vault_progress.stop()
+            self.vault_progress.pack_forget()
+            self.vault_status_var.set("")
+            self.root.config(cursor="")
+
+    def run_vault_task(self, message, func, *args, done=None):
+        """Операция с хранилищем в фоновом потоке с сообщением в строке состояния"""
+        self.vault_status_var.set(message)
+        self.worker.submit(func, *args, done=done)
+
+    def show_vault_content(self):
+        """Переключение с экрана входа на список паролей"""
+        self.vault_content_frame.pack(fill=tk.BOTH, expand=True)
+        self.login_frame.pack_forget()
+
     def unlock_vault(self):
         """Разблокировка хранилища"""
         master_password = self.master_password_var.get()
@@ -444,15 +678,18 @@ class PasswordGeneratorApp:
             messagebox.showwarning("Предупреждение", "Введите мастер-пароль!")
             return
 
-        if vault.unlock_vault(master_password):
-            self.vault_unlocked = True
-            self.master_password = master_password
-            self.vault_content_frame.pack(fill=tk.BOTH, expand=True)
-            self.login_frame.pack_forget()
-            self.refresh_password_list()
-            messagebox.showinfo("Успех", "Хранилище разблокировано!")
-        else:
-            messagebox.showerror("Ошибка", "Неверный мастер-пароль!")
+        def done(unlocked):
+            if unlocked:
+                self.vault_unlocked = True
+                self.master_password = master_password
+                self.show_vault_content()
+                self.refresh_password_list()
+                messagebox.showinfo("Успех", "Хранилище разблокировано!")
+            else:
+                messagebox.showerror("Ошибка", "Неверный мастер-пароль!")
+
+        self.run_vault_task("Проверка мастер-пароля...", vault.unlock_vault, master_password,
+                            done=done)
 
     def create_vault(self):
         """Создание нового хранилища"""
@@ -468,44 +705,170 @@ class PasswordGeneratorApp:
             )
             return
 
-        if vault.create_vault(master_password):
-            self.vault_unlocked = True
-            self.master_password = master_password
-            self.vault_content_frame.pack(fill=tk.BOTH, expand=True)
-            self.login_frame.pack_forget()
-            messagebox.showinfo("Успех", "Хранилище успешно создано!")
-        else:
-            messagebox.showerror("Ошибка", "Не удалось создать хранилище!")
+        def done(created):
+            if created:
+                self.vault_unlocked = True
+                self.master_password = master_password
+                self.show_vault_content()
+                self.refresh_password_list()
+                messagebox.showinfo("Успех", "Хранилище успешно создано!")
+            else:
+                messagebox.showerror("Ошибка", "Не удалось создать хранилище!")
+
+        self.run_vault_task("Создание хранилища...", vault.create_vault, master_password,
+                            done=done)
 
     def lock_vault(self):
         """Блокировка хранилища"""
-        vault.lock_vault()
+        # Список скрывается сразу, а само хранилище блокируется после
+        # уже отправленных операций
         self.vault_unlocked = False
         self.master_password = None
+        self.refresh_seq += 1
         self.vault_content_frame.pack_forget()
         self.login_frame.pack(fill=tk.BOTH, expand=True)
         self.master_password_var.set("")
+        self.search_var.set("")
+        self.apply_rows({})
+        self.run_vault_task("Блокировка...", vault.lock_vault)
 
     def refresh_password_list(self):
         """Обновление списка паролей"""
-        for item in self.password_tree.get_children():
-            self.password_tree.delete(item)
-
-        passwords = vault.get_passwords()
-        for pwd in passwords:
-            self.password_tree.insert(
-                "",
-                tk.END,
-                iid=pwd['id'],
-                values=(
-                    pwd['service'],
-                    pwd['username'],
-                    "••••••••",
-                    pwd['notes'][:30] + "..." if len(pwd['notes']) > 30 else pwd['notes'],
-                    pwd['created_at'],
-                    pwd['updated_at']
-                )
-            )
+        if not self.vault_unlocked:
+            return
+
+        # При быстром наборе в поиске устаревшие запросы пропускаются
+        self.refresh_seq += 1
+        seq = self.refresh_seq
+        query = self.search_var.get().strip()
+        mode = self.search_modes[self.search_mode_var.get()]
+
+        def load():
+            if seq != self.refresh_seq:
+                return None
+            if query:
+                passwords = vault.search(query, mode=mode, limit=500)
+            else:
+                passwords = vault.get_passwords()
+            return {pwd['id']: self.row_values(pwd) for pwd in passwords}
+
+        def done(rows):
+            if rows is not None and seq == self.refresh_seq:
+                self.apply_rows(rows)
+
+        self.run_vault_task("Загрузка паролей...", load, done=done)
+
+    @staticmethod
+    def row_values(pwd):
+        """Значения колонок списка для записи"""
+        notes = pwd.get('notes') or ''
+        return (
+            pwd['service'],
+            pwd['username'],
+            "••••••••",
+            notes[:30] + "..." if len(notes) > 30 else notes,
+            pwd.get('created_at', ''),
+            pwd.get('updated_at', '')
+        )
+
+    def apply_rows(self, rows):
+        """Новый набор строк: в дереве меняются только затронутые строки окна"""
+        _, removed = self.rows.update(rows)
+        if self.selected_id in removed:
+            self.selected_id = None
+        self.render_password_list()
+
+    def sort_password_list(self, column):
+        """Сортировка списка по колонке по готовому индексу ключей"""
+        self.rows.sort_by(column)
+        for index, col in enumerate(self.tree_columns):
+            arrow = ""
+            if index == column:
+                arrow = " ▼" if self.rows.descending else " ▲"
+            self.password_tree.heading(col, text=col + arrow)
+        self.view_top = 0
+        self.render_password_list()
+
+    def visible_row_count(self):
+        """Число строк, которые помещаются в дерево по высоте"""
+        rowheight = int(self.style.lookup('Treeview', 'rowheight') or 20)
+        height = self.password_tree.winfo_height()
+        if height <= 1:
+            return int(self.password_tree.cget('height'))
+        # За вычетом строки заголовков
+        return max(1, height // rowheight - 1)
+
+    def render_password_list(self):
+        """
+        Отрисовка окна списка: строки, ушедшие из окна, удаляются,
+        новые вставляются, измененные обновляются, остальные не трогаются
+        """
+        tree = self.password_tree
+        order = self.rows.order
+        visible = self.visible_row_count()
+        self.view_top = max(0, min(self.view_top, len(order) - visible))
+        window = order[self.view_top:self.view_top + visible + self.ROW_BUFFER]
+
+        wanted = set(window)
+        stale = [i for i in self.rendered if i not in wanted]
+        if stale:
+            tree.delete(*stale)
+            for i in stale:
+                del self.rendered[i]
+
+        current = [int(i) for i in tree.get_children()]
+        position = 0
+        for index, entry_id in enumerate(window):
+            values = self.rows.values[entry_id]
+            if entry_id not in self.rendered:
+                tree.insert("", index, iid=entry_id, values=values)
+            else:
+                if self.rendered[entry_id] != values:
+                    tree.item(entry_id, values=values)
+                while position < len(current) and current[position] not in wanted:
+                    position += 1
+                if position < len(current) and current[position] == entry_id:
+                    position += 1
+                else:
+                    tree.move(entry_id, "", index)
+            self.rendered[entry_id] = values
+
+        if self.selected_id in self.rendered and not tree.selection():
+            tree.selection_set(self.selected_id)
+
+        total = len(order)
+        if total:
+            self.tree_scrollbar.set(self.view_top / total, min(1.0, (self.view_top + visible) / total))
+        else:
+            self.tree_scrollbar.set(0.0, 1.0)
+
+    def scroll_password_list(self, action, amount, unit=None):
+        """Команда полосы прокрутки: moveto или scroll на строки/страницы"""
+        if action == 'moveto':
+            self.view_top = int(float(amount) * len(self.rows.order))
+        else:
+            step = self.visible_row_count() if unit == 'pages' else 1
+            self.view_top += int(amount) * step
+        self.render_password_list()
+
+    def on_tree_wheel(self, event):
+        """Прокрутка колесом мыши"""
+        if event.num == 4 or getattr(event, 'delta', 0) > 0:
+            self.scroll_password_list('scroll', -3)
+        else:
+            self.scroll_password_list('scroll', 3)
+        return "break"
+
+    def on_tree_select(self, event):
+        """
+        Запоминание выбранной записи: она остается выбранной, даже когда
+        ее строка уходит из окна при прокрутке
+        """
+        selected = self.password_tree.selection()
+        if selected:
+            self.selected_id = int(selected[0])
+        elif self.selected_id in self.rendered:
+            self.selected_id = None
 
     def add_password_dialog(self):
         """Диалог добавления пароля"""
@@ -555,41 +918,52 @@ class PasswordGeneratorApp:
                 messagebox.showwarning("Предупреждение", "Заполните все обязательные поля!")
                 return
 
-            if vault.add_password(service, username, password, notes):
-                self.refresh_password_list()
-                dialog.destroy()
-                messagebox.showinfo("Успех", "Пароль сохранен!")
-            else:
-                messagebox.showerror("Ошибка", "Не удалось сохранить пароль!")
-
-        ttk.Button(button_frame, text="Сохранить", command=save).pack(side=tk.LEFT, padx=5)
+            def done(saved):
+                if saved:
+                    self.refresh_password_list()
+                    if dialog.winfo_exists():
+                        dialog.destroy()
+                    messagebox.showinfo("Успех", "Пароль сохранен!")
+                else:
+                    if dialog.winfo_exists():
+                        save_button.config(state=tk.NORMAL)
+                    messagebox.showerror("Ошибка", "Не удалось сохранить пароль!")
+
+            save_button.config(state=tk.DISABLED)
+            self.run_vault_task("Сохранение...", vault.add_password,
+                                service, username, password, notes, done=done)
+
+        save_button = ttk.Button(button_frame, text="Сохранить", command=save)
+        save_button.pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Отмена", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
 
     def delete_password(self):
         """Удаление пароля"""
-        selected = self.password_tree.selection()
-        if not selected:
+        if self.selected_id is None:
             messagebox.showwarning("Предупреждение", "Выберите пароль для удаления!")
             return
 
         if messagebox.askyesno("Подтверждение", "Вы уверены, что хотите удалить этот пароль?"):
-            if vault.delete_password(int(selected[0])):
-                self.refresh_password_list()
-                messagebox.showinfo("Успех", "Пароль удален!")
+            def done(deleted):
+                if deleted:
+                    self.refresh_password_list()
+                    messagebox.showinfo("Успех", "Пароль удален!")
+
+            self.run_vault_task("Удаление...", vault.delete_password, self.selected_id,
+                                done=done)
 
     def copy_password(self):
         """Копирование пароля"""
-        selected = self.password_tree.selection()
-        if not selected:
+        if self.selected_id is None:
             messagebox.showwarning("Предупреждение", "Выберите пароль!")
             return
 
-        passwords = vault.get_passwords()
-        for pwd in passwords:
-            if pwd['id'] == int(selected[0]):
+        def done(pwd):
+            if pwd:
                 pyperclip.copy(pwd['password'])
                 messagebox.showinfo("Успех", "Пароль скопирован в буфер обмена!")
-                break
+
+        self.run_vault_task("Чтение пароля...", vault.get_password, self.selected_id, done=done)
 
 
 def main():
@@ -0,0 +1,129 @@
+import base64
+import json
+import os
+from hashlib import blake2b
+from typing import List, Optional
+
+from entropy import pool
+
+
+class PinIssuer:
+    """
+    Выдача гарантированно уникальных PIN-кодов.
+
+    Номер очередного PIN (курсор) пропускается через ключевую перестановку
+    пространства 10^length: сбалансированную сеть Фейстеля с раундовой
+    функцией на ключевом BLAKE2b и "проходом по циклу" для значений вне
+    диапазона.
+    Перестановка биективна, поэтому PIN не повторяются, а из состояния
+    нужно хранить только ключ и курсор.
+    """
+
+    ROUNDS = 10
+
+    def __init__(self, key: bytes, length: int = 6, cursor: int = 0):
+        if length < 1:
+            raise ValueError("Длина PIN должна быть положительной")
+
+        self.key = key
+        self.length = length
+        self.space = 10 ** length
+        if not 0 <= cursor <= self.space:
+            raise ValueError(f"Курсор должен быть от 0 до {self.space}")
+        self.cursor = cursor
+
+        # Половина ширины сети Фейстеля: 4^half_bits >= 10^length
+        self.half_bits = max(1, ((self.space - 1).bit_length() + 1) // 2)
+        self._half_mask = (1 << self.half_bits) - 1
+        self._half_bytes = (self.half_bits + 7) // 8
+
+    @classmethod
+    def create(cls, length: int = 6) -> 'PinIssuer':
+        """
+        Новый эмитент со случайным ключом
+        """
+        return cls(pool.randbytes(32), length)
+
+    @property
+    def remaining(self) -> int:
+        """Сколько PIN еще можно выдать"""
+        return self.space - self.cursor
+
+    def issue(self) -> str:
+        """
+        Следующий уникальный PIN
+        """
+        return self.issue_many(1)[0]
+
+    def issue_many(self, n: int) -> List[str]:
+        """
+        Пакет из n уникальных PIN
+        """
+        if n < 0:
+            raise ValueError("Число PIN не может быть отрицательным")
+        if n > self.remaining:
+            raise ValueError(f"Осталось только {self.remaining} PIN-кодов")
+
+        start = self.cursor
+        pins = [str(self._permute(i)).zfill(self.length) for i in range(start, start + n)]
+        self.cursor = start + n
+        return pins
+
+    def _permute(self, value: int) -> int:
+        """
+        Ключевая перестановка на [0, 10^length)
+        """
+        while True:
+            value = self._feistel(value)
+            if value < self.space:
+                return value
+
+    def _feistel(self, value: int) -> int:
+        """
+        Перестановка на [0, 4^half_bits) сетью Фейстеля
+        """
+        left = value >> self.half_bits
+        right = value & self._half_mask
+        for round_no in range(self.ROUNDS):
+            message = bytes([round_no]) + right.to_bytes(self._half_bytes, 'big')
+            digest = blake2b(message, key=self.key, digest_size=8).digest()
+            left, right = right, left ^ (int.from_bytes(digest, 'big') & self._half_mask)
+        return (left << self.half_bits) | right
+
+    def state(self) -> dict:
+        """
+        Состояние для сохранения
+        """
+        return {
+            'key': base64.b64encode(self.key).decode(),
+            'length': self.length,
+            'cursor': self.cursor
+        }
+
+    def save(self, path: str) -> bool:
+        """
+        Сохранение курсора и ключа (файл нужно хранить так же бережно, как ключ)
+        """
+        try:
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self.state(), f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+            return True
+        except Exception as e:
+            print(f"Ошибка сохранения состояния PIN: {e}")
+            return False
+
+    @classmethod
+    def load(cls, path: str) -> Optional['PinIssuer']:
+        """
+        Продолжение выдачи с сохраненного курсора
+        """
+        try:
+            with open(path, 'r') as f:
+                state = json.load(f)
+            return cls(base64.b64decode(state['key']), state['length'], state['cursor'])
+        except Exception:
+            return None
@@ -0,0 +1,107 @@
+import string
+from math import log2
+from typing import List, Tuple
+
+from entropy import pool, translation_table
+
+VOWELS = 'aeiou'
+CONSONANTS = ''.join(c for c in string.ascii_lowercase if c not in VOWELS)
+
+# Согласные, которые могут идти следом за согласной (bl, str, ch, ...)
+CLUSTERS = {
+    'b': 'lr', 'c': 'hlr', 'd': 'r', 'f': 'lr', 'g': 'lr', 'k': 'lr',
+    'p': 'hlr', 's': 'hklmnpt', 't': 'hr', 'w': 'h',
+}
+
+# Гласные, которые могут идти следом за гласной (ai, ou, ...); после второй
+# гласной всегда идет согласная, поэтому больше двух гласных подряд не бывает
+DIPHTHONGS = {'a': 'iu', 'e': 'iu', 'o': 'iu'}
+
+START = 0
+
+
+def _successors(prev: int) -> str:
+    """
+    Допустимые буквы после предыдущей (START - начало пароля)
+    """
+    if prev == START:
+        return string.ascii_lowercase
+    c = chr(prev)
+    if c in VOWELS:
+        return CONSONANTS + DIPHTHONGS.get(c, '')
+    return VOWELS + CLUSTERS.get(c, '')
+
+
+def _compile() -> tuple:
+    """
+    Таблицы переходов: для каждого состояния 256 байтов, отображающих
+    случайный байт в следующую букву (0 - байт отброшен ради равномерности),
+    и число вариантов перехода для подсчета энтропии
+    """
+    tables = [None] * 256
+    counts = [0] * 256
+    for prev in [START] + [ord(c) for c in string.ascii_lowercase]:
+        letters = _successors(prev)
+        table, _, limit = translation_table(letters)
+        tables[prev] = table[:limit] + bytes(256 - limit)
+        counts[prev] = len(letters)
+    return tables, counts
+
+
+class PronounceableGenerator:
+    """Генератор произносимых паролей на таблице переходов между буквами"""
+
+    BLOCK_SIZE = 4096
+
+    def __init__(self):
+        self.tables, self.counts = _compile()
+
+    def generate(self, length: int = 12) -> Tuple[str, float]:
+        """
+        Произносимый пароль и его точная энтропия в битах
+        """
+        return self.generate_many(1, length)[0]
+
+    def generate_many(self, n: int, length: int = 12) -> List[Tuple[str, float]]:
+        """
+        Пакетная генерация n паролей вместе с их энтропией.
+
+        Энтропия считается как -log2 вероятности конкретного пароля: буквы
+        однозначно задают путь по таблице, поэтому это точное значение, а не
+        оценка по алфавиту.
+        """
+        if length <= 0:
+            return [('', 0.0)] * max(n, 0)
+
+        decorate = length > 4
+        letters = length - 1 if decorate else length
+        tables, counts = self.tables, self.counts
+        buffer = pool.randbytes(self.BLOCK_SIZE)
+        pos = 0
+
+        results = []
+        for _ in range(n):
+            out = bytearray()
+            state = START
+            variants = 1
+            while len(out) < letters:
+                if pos == len(buffer):
+                    buffer = pool.randbytes(self.BLOCK_SIZE)
+                    pos = 0
+                c = tables[state][buffer[pos]]
+                pos += 1
+                if c:
+                    variants *= counts[state]
+                    out.append(c)
+                    state = c
+
+            password = out.decode('ascii')
+            if decorate:
+                password = password[0].upper() + password[1:] + pool.choice(string.digits)
+                variants *= 10
+            results.append((password, log2(variants)))
+
+        return results
+
+
+pronounceable = PronounceableGenerator()
@@ -0,0 +1,279 @@
+import base64
+import sys
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# Поля записи, по которым ведется поиск
+FIELDS = ('service', 'username', 'notes')
+MODES = ('prefix', 'substring', 'fuzzy')
+
+
+def _pack(ids: Iterable[int]) -> str:
+    """Список id в компактном виде для сохранения (uint32, little-endian)"""
+    packed = array('I', ids)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return base64.b64encode(packed.tobytes()).decode()
+
+
+def _unpack(data: str) -> array:
+    """Обратное преобразование к _pack"""
+    ids = array('I', base64.b64decode(data))
+    if sys.byteorder == 'big':
+        ids.byteswap()
+    return ids
+
+
+def _trigrams(value: str) -> set:
+    """
+    Триграммы значения с дополнением пробелами по краям, как в pg_trgm:
+    так у коротких строк и у начала/конца слова тоже есть триграммы
+    """
+    padded = f"  {value} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """
+    Поисковый индекс по сервису, логину и заметкам.
+
+    Для каждого поля хранятся отсортированный список пар (значение, id),
+    по которому префиксный поиск идет двоичным поиском (плоская замена
+    префиксного дерева), и инвертированный индекс триграмм для поиска по
+    подстроке и нечеткого поиска (списки id хранятся в компактных
+    массивах и сохраняются целиком, чтобы не строить их заново при каждой
+    загрузке). Из списков триграмм id при изменении
+    записи не удаляются: лишние отсеиваются проверкой по значению, а когда
+    их накапливается слишком много, списки строятся заново.
+    """
+
+    FUZZY_THRESHOLD = 0.5
+
+    def __init__(self, entries: Iterable[Dict] = ()):
+        self.values = {entry['id']: self._normalize(entry) for entry in entries}
+        self._sorted = {}
+        self._postings = {}
+        self._stale = 0
+        self._build()
+
+    @staticmethod
+    def _normalize(entry: Dict) -> tuple:
+        """Значения индексируемых полей записи в нижнем регистре"""
+        return tuple(str(entry.get(field) or '').lower() for field in FIELDS)
+
+    def put(self, entry: Dict):
+        """
+        Добавление записи или обновление ее значений
+        """
+        entry_id = entry['id']
+        new = self._normalize(entry)
+        old = self.values.get(entry_id)
+        if old == new:
+            return
+
+        self.values[entry_id] = new
+        for k, field in enumerate(FIELDS):
+            before = old[k] if old else ''
+            if before == new[k]:
+                continue
+            keys = self._sorted[field]
+            if before:
+                del keys[bisect_left(keys, (before, entry_id))]
+                self._stale += 1
+            if new[k]:
+                insort(keys, (new[k], entry_id))
+                postings = self._postings[field]
+                for trigram in _trigrams(new[k]) - (_trigrams(before) if before else set()):
+                    postings.setdefault(trigram, array('I')).append(entry_id)
+        self._maybe_rebuild()
+
+    def remove(self, entry_id: int):
+        """
+        Удаление записи из индекса
+        """
+        old = self.values.pop(entry_id, None)
+        if old is None:
+            return
+        for k, field in enumerate(FIELDS):
+            if old[k]:
+                keys = self._sorted[field]
+                del keys[bisect_left(keys, (old[k], entry_id))]
+                self._stale += 1
+        self._maybe_rebuild()
+
+    def apply(self, record: Dict):
+        """
+        Применение операции журнала хранилища
+        """
+        op = record['op']
+        if op == 'add':
+            self.put(record['entry'])
+        elif op == 'delete':
+            self.remove(record['id'])
+        elif op == 'update' and record['id'] in self.values:
+            entry = dict(zip(FIELDS, self.values[record['id']]), id=record['id'])
+            entry.update(record['fields'])
+            self.put(entry)
+
+    def _build(self):
+        """
+        Построение отсортированных значений и списков триграмм целиком
+        """
+        self._stale = 0
+        for k, field in enumerate(FIELDS):
+            postings = {}
+            for entry_id, values in self.values.items():
+                if values[k]:
+                    for trigram in _trigrams(values[k]):
+                        postings.setdefault(trigram, array('I')).append(entry_id)
+            self._postings[field] = postings
+            self._sorted[field] = sorted((values[k], entry_id)
+                                         for entry_id, values in self.values.items() if values[k])
+
+    def _maybe_rebuild(self):
+        """
+        Перестройка индекса, когда устаревших id в списках триграмм стало
+        больше, чем записей
+        """
+        if self._stale > max(len(self.values), 1000):
+            self._build()
+
+    def search(self, query: str, field: Optional[str] = None, mode: str = 'substring',
+               limit: int = 50) -> List[int]:
+        """
+        id записей, подходящих под запрос, не больше limit.
+
+        prefix - значение начинается с запроса (по алфавиту),
+        substring - значение содержит запрос (в порядке добавления),
+        fuzzy - похожие значения по доле общих триграмм (сначала самые похожие).
+        Без field поиск идет по всем полям.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Неизвестный режим поиска: {mode}")
+        if field is not None and field not in FIELDS:
+            raise ValueError(f"Поиск по полю {field} не поддерживается")
+
+        query = query.lower()
+        if not query:
+            return []
+        fields = [field] if field else list(FIELDS)
+
+        if mode == 'fuzzy':
+            return self._fuzzy(query, fields, limit)
+
+        found = {}
+        for name in fields:
+            if mode == 'prefix':
+                ids = self._prefix(query, name, limit)
+            else:
+                ids = self._substring(query, name)
+            for entry_id in ids:
+                found[entry_id] = None
+                if len(found) == limit:
+                    return list(found)
+        return list(found)
+
+    def _prefix(self, query: str, field: str, limit: int) -> List[int]:
+        """
+        Префиксный поиск двоичным поиском по отсортированным значениям
+        """
+        keys = self._sorted[field]
+        found = []
+        for i in range(bisect_left(keys, (query,)), len(keys)):
+            value, entry_id = keys[i]
+            if not value.startswith(query) or len(found) == limit:
+                break
+            found.append(entry_id)
+        return found
+
+    def _substring(self, query: str, field: str) -> Iterator[int]:
+        """
+        Поиск по подстроке: обход самого короткого списка триграмм запроса
+        с проверкой значения, так что поиск останавливается, как только
+        набрано нужное число записей. Запросы короче трех символов
+        проверяются перебором
+        """
+        k = FIELDS.index(field)
+        values = self.values
+        if len(query) < 3:
+            return (entry_id for entry_id, value in values.items() if query in value[k])
+
+        postings = self._postings[field]
+        shortest = min((postings.get(query[i:i + 3], ()) for i in range(len(query) - 2)), key=len)
+        return (entry_id for entry_id in shortest
+                if entry_id in values and query in values[entry_id][k])
+
+    def _fuzzy(self, query: str, fields: List[str], limit: int) -> List[int]:
+        """
+        Нечеткий поиск: доля триграмм запроса, найденных в значении (как
+        word_similarity в pg_trgm), так что опечатка в части длинного
+        значения тоже находится. Кандидаты - записи с наибольшим числом
+        общих редких триграмм: частые почти не различают записи, а их
+        списки дорого обходить
+        """
+        wanted = _trigrams(query)
+        common = max(1000, len(self.values) // 10)
+        scores = {}
+        for field in fields:
+            k = FIELDS.index(field)
+            postings = self._postings[field]
+            lists = sorted((postings.get(trigram, ()) for trigram in wanted), key=len)
+            rare = [ids for ids in lists if len(ids) <= common] or lists[:1]
+            counts = Counter(chain.from_iterable(rare))
+            for entry_id, _ in counts.most_common(limit * 4):
+                values = self.values.get(entry_id)
+                if not values or not values[k]:
+                    continue
+                score = len(wanted & _trigrams(values[k])) / len(wanted)
+                if score >= self.FUZZY_THRESHOLD and score > scores.get(entry_id, 0.0):
+                    scores[entry_id] = score
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [entry_id for entry_id, _ in islice(ranked, limit)]
+
+    def dump(self) -> Dict:
+        """
+        Состояние индекса для сохранения. Списки триграмм поля хранятся
+        одним массивом id и массивом длин, а не словарем из тысяч строк
+        """
+        postings = {}
+        for field in FIELDS:
+            items = self._postings[field].items()
+            postings[field] = {
+                'trigrams': [trigram for trigram, _ in items],
+                'counts': _pack(len(ids) for _, ids in items),
+                'ids': _pack(chain.from_iterable(ids for _, ids in items))
+            }
+        return {
+            'values': [[entry_id, *values] for entry_id, values in self.values.items()],
+            'sorted': {field: _pack(entry_id for _, entry_id in self._sorted[field])
+                       for field in FIELDS},
+            'postings': postings,
+            'stale': self._stale
+        }
+
+    @classmethod
+    def load(cls, state: Dict) -> 'SearchIndex':
+        """
+        Индекс из сохраненного состояния без повторного построения
+        """
+        index = cls.__new__(cls)
+        index.values = {row[0]: tuple(row[1:]) for row in state['values']}
+        index._sorted = {}
+        index._postings = {}
+        for k, field in enumerate(FIELDS):
+            index._sorted[field] = [(index.values[entry_id][k], entry_id)
+                                    for entry_id in _unpack(state['sorted'][field])]
+            saved = state['postings'][field]
+            ids = _unpack(saved['ids'])
+            postings = {}
+            end = 0
+            for trigram, count in zip(saved['trigrams'], _unpack(saved['counts'])):
+                postings[trigram] = ids[end:end + count]
+                end += count
+            index._postings[field] = postings
+        index._stale = state['stale']
+        return index
@@ -1,53 +1,84 @@
-import random
 import string
-import secrets
+from array import array
+from math import log2
+
+from entropy import pool
+from generator import DIGIT, LOWER, SYMBOL, UPPER, class_mask, class_table
+from pronounceable import pronounceable
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 def generate_pronounceable(length=12):
     """
     Генерация произносимого пароля
     """
-    vowels = 'aeiou'
-    consonants = ''.join(c for c in string.ascii_lowercase if c not in vowels)
+    return pronounceable.generate(length)[0]
 
-    password = []
-    for i in range(length):
-        if i % 2 == 0:
-            password.append(random.choice(consonants))
-        else:
-            password.append(random.choice(vowels))
 
-    if length > 4:
-        password[0] = password[0].upper()
-        password[-1] = random.choice(string.digits)
+def generate_pin(length=6):
+    """
+    Генерация PIN-кода
+    """
+    return pool.choices(string.digits, length)
+
 
-    return ''.join(password)
+# Классы символов для оценки энтропии: строчные, заглавные, цифры, пунктуация
+_CLASS_SIZES = ((LOWER, 26), (UPPER, 26), (DIGIT, 10), (SYMBOL, len(string.punctuation)))
 
+# Бит на символ для каждой комбинации классов
+_BITS_PER_CHAR = tuple(
+    log2(sum(size for bit, size in _CLASS_SIZES if mask & bit) or 1)
+    for mask in range(16)
+)
 
-def generate_pin(length=6):
+
+def _class_mask(password):
     """
-    Генерация PIN-кода
+    Объединение классов символов пароля (спецсимволы - вся пунктуация ASCII)
+    """
+    return class_mask(password, string.punctuation)
+
+
+def calculate_entropy(password, policy=None):
+    """
+    Расчет энтропии пароля (бит).
+
+    Если известна политика, по которой пароль сгенерирован, энтропия
+    берется из нее без просмотра пароля; иначе оценивается по классам
+    символов как длина * log2(размер алфавита).
     """
-    return ''.join(secrets.choice(string.digits) for _ in range(length))
+    if policy is not None:
+        return policy.entropy(len(password))
+    return len(password) * _BITS_PER_CHAR[_class_mask(password)]
 
 
-def calculate_entropy(password):
+def calculate_entropy_many(passwords, policy=None):
     """
-    Расчет энтропии пароля
+    Энтропия для списка паролей: массив NumPy float64 (или array('d') без NumPy)
     """
-    charset_size = 0
+    if np is None:
+        return array('d', (calculate_entropy(p, policy) for p in passwords))
 
-    if any(c.islower() for c in password):
-        charset_size += 26
-    if any(c.isupper() for c in password):
-        charset_size += 26
-    if any(c.isdigit() for c in password):
-        charset_size += 10
-    if any(c in string.punctuation for c in password):
-        charset_size += len(string.punctuation)
+    lengths = np.fromiter(map(len, passwords), dtype=np.int64, count=len(passwords))
+    if policy is not None:
+        table = np.array([policy.entropy(n) for n in range(int(lengths.max(initial=0)) + 1)])
+        return table[lengths]
 
-    if charset_size == 0:
-        return 0
+    try:
+        data = ''.join(passwords).encode('latin-1')
+    except UnicodeEncodeError:
+        masks = np.fromiter(map(_class_mask, passwords), dtype=np.uint8, count=len(passwords))
+    else:
+        # Маски всех символов одним буфером, затем ИЛИ по границам паролей
+        classes = np.frombuffer(data.translate(class_table(string.punctuation)), dtype=np.uint8)
+        masks = np.zeros(len(passwords), dtype=np.uint8)
+        nonempty = lengths > 0
+        if classes.size:
+            starts = (np.cumsum(lengths) - lengths)[nonempty]
+            masks[nonempty] = np.bitwise_or.reduceat(classes, starts)
 
-    entropy = len(password) * (charset_size.bit_length())
-    return entropy
\ No newline at end of file
+    return lengths * np.array(_BITS_PER_CHAR)[masks]
@@ -1,67 +1,766 @@
 import os
+import hmac
 import json
+import mmap
 import base64
+import threading
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
 from datetime import datetime
-from typing import List, Dict, Optional
-from cryptography.fernet import Fernet
+from typing import Dict, Iterable, Iterator, List, Optional
+from cryptography.fernet import Fernet, InvalidToken
 from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from compression import DEFAULT as DEFAULT_COMPRESSION, NONE, Codec, codec_by_name, get_codec
+from search import SearchIndex
+from vault_format import (FORMAT_BINARY, FORMAT_JSON, FORMAT_JSON_RECORDS, KDF_ITERATIONS,
+                          KDF_PBKDF2_SHA256, VERSION, pack_header, pack_index, read_header,
+                          shard_of, unpack_index)
+
+# Наибольшее число шардов
+MAX_SHARDS = 256
+
+
+def _raw(token: bytes) -> bytes:
+    """Токен Fernet в сыром виде для записи в контейнер"""
+    return base64.urlsafe_b64decode(token)
+
+
+def _token(raw: bytes) -> bytes:
+    """Сырой токен из контейнера в виде, который принимает Fernet"""
+    return base64.urlsafe_b64encode(raw)
+
+
+def derive_key(master_password: str, salt: bytes, iterations: int = KDF_ITERATIONS) -> bytes:
+    """
+    Ключ шифрования из мастер-пароля (PBKDF2-SHA256). Отдельная функция
+    без состояния, чтобы ее можно было вычислить в другом процессе
+    """
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt,
+        iterations=iterations,
+    )
+    return base64.urlsafe_b64encode(kdf.derive(master_password.encode()))
+
+
+def _read_raw(places: List[tuple]) -> List[bytes]:
+    """
+    Токены записей по расположению (файл, смещение, длина); каждый файл
+    открывается и отображается в память один раз
+    """
+    tokens = []
+    with ExitStack() as stack:
+        files = {}
+        for path, start, length in places:
+            data = files.get(path)
+            if data is None:
+                f = stack.enter_context(open(path, 'rb'))
+                data = files[path] = stack.enter_context(
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            tokens.append(data[start:start + length])
+    return tokens
+
+
+def _decrypt_records(key: bytes, codec: int, binary: bool, places: List[tuple]) -> List[tuple]:
+    """
+    Чтение и расшифровка записей по расположению. Отдельная функция без
+    состояния, чтобы ее можно было выполнить в процессе-исполнителе.
+    Возвращает пары (запись, сырой токен)
+    """
+    return _decrypt_raw(Fernet(key), get_codec(codec), binary, _read_raw(places))
+
+
+def _decrypt_raw(cipher: Fernet, codec: Codec, binary: bool, tokens: List[bytes]) -> List[tuple]:
+    """
+    Расшифровка токенов, прочитанных из файла, в пары (запись, сырой токен)
+    """
+    decompress = codec.decompress
+    records = []
+    for raw in tokens:
+        if not binary:
+            raw = _raw(raw)
+        records.append((json.loads(decompress(cipher.decrypt(_token(raw)))), raw))
+    return records
+
+
+def _apply(entries: Dict[int, Dict], record: Dict) -> tuple:
+    """
+    Применение операции журнала к словарю записей (на месте).
+    Возвращает id и прежнюю запись (None, если ее не было) для отката
+    """
+    op = record['op']
+    if op == 'add':
+        entry = dict(record['entry'])
+        previous = entries.get(entry['id'])
+        entries[entry['id']] = entry
+        return entry['id'], previous
+    previous = entries.get(record['id'])
+    if previous is not None:
+        if op == 'update':
+            entries[record['id']] = dict(previous, **record['fields'])
+        elif op == 'delete':
+            del entries[record['id']]
+    return record['id'], previous
+
+
+def _index_entries(entries: List[Dict], next_id: int = 1) -> tuple:
+    """
+    Словарь записей по id из списка (так хранились записи в старых
+    файлах). Записи без id или с уже занятым id получают новый.
+    Возвращает словарь и следующий свободный id
+    """
+    ids = [entry['id'] for entry in entries if isinstance(entry.get('id'), int)]
+    next_id = max([next_id] + [i + 1 for i in ids])
+    mapping = {}
+    for entry in entries:
+        if not isinstance(entry.get('id'), int) or entry['id'] in mapping:
+            entry = dict(entry, id=next_id)
+            next_id += 1
+        mapping[entry['id']] = entry
+    return mapping, next_id
+
+
+class VaultError(Exception):
+    """Ошибка работы с хранилищем"""
+
+
+class VaultConflictError(VaultError):
+    """Хранилище изменено другим процессом после чтения"""
 
 
 class PasswordVault:
     """Зашифрованное хранилище паролей"""
 
-    def __init__(self, vault_file='data/vault.dat'):
+    # Журнал сворачивается в новый снимок, когда в нем накопилось столько
+    # записей или когда он вырос до этой доли от размера снимка
+    COMPACT_RECORDS = 1000
+    COMPACT_RATIO = 0.5
+    COMPACT_MIN_BYTES = 64 * 1024
+
+    # Меньше записей быстрее расшифровать в своем процессе, чем передавать
+    # в пул и обратно
+    PARALLEL_MIN_RECORDS = 5000
+
+    def __init__(self, vault_file='data/vault.dat', journal: bool = False,
+                 compression: Optional[str] = None, on_conflict: str = 'merge',
+                 shards: Optional[int] = None, workers: Optional[int] = None):
         self.vault_file = vault_file
+        self.journal_file = vault_file + '.journal'
+        self.index_file = vault_file + '.index'
+        self.lock_file = vault_file + '.lock'
+        self.journal = journal
+        # Что делать, если другой процесс изменил хранилище после чтения:
+        # merge - применить свои операции поверх его изменений, fail - отказ
+        if on_conflict not in ('merge', 'fail'):
+            raise ValueError(f"Неизвестный режим конфликта: {on_conflict}")
+        self.on_conflict = on_conflict
+        # Алгоритм сжатия записей перед шифрованием (none, zlib, lzma, zstd)
+        # применяется со следующей записи снимка; если не задан, остается
+        # алгоритм открытого файла
+        if compression:
+            codec_by_name(compression)
+        self.compression = compression
+        # Число файлов-шардов для записей (0 - записи в самом файле
+        # хранилища); как и сжатие, применяется со следующей записи снимка.
+        # Шарды расшифровываются параллельно в пуле из workers процессов
+        if shards is not None and not 0 <= shards <= MAX_SHARDS:
+            raise ValueError(f"Число шардов должно быть от 0 до {MAX_SHARDS}")
+        self.shards = shards
+        self.workers = workers or os.cpu_count() or 1
         self.key = None
         self.cipher = None
         self.unlocked = False
+        self._header = None
+        self._entries = None
+        self._stamp = None
+        self._journal_seq = 0
+        self._journal_pos = 0
+        self._journal_count = 0
+        self._index = None
+        self._binary = False
+        self._codec = NONE
+        self._tokens = {}
+        self._next_id = 1
+        self._services = None
+        self._search = None
+        self._search_dirty = False
+        self._lock = threading.RLock()
+        self._lock_fd = None
+        self._lock_mode = 0
+        self._compactor = None
+        self._pending = None
+        self._pool = None
         self._ensure_data_dir()
 
     def _ensure_data_dir(self):
         """Создание директории для данных"""
         os.makedirs(os.path.dirname(self.vault_file), exist_ok=True)
 
-    def _derive_key(self, master_password: str, salt: bytes = None) -> tuple:
+    def _derive_key(self, master_password: str, salt: bytes = None,
+                    iterations: int = KDF_ITERATIONS) -> tuple:
         """
         Получение ключа шифрования из мастер-пароля
         """
         if salt is None:
             salt = os.urandom(16)
+        return derive_key(master_password, salt, iterations), salt
 
-        kdf = PBKDF2(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(master_password.encode()))
-        return key, salt
+    @staticmethod
+    def _key_check(key: bytes) -> bytes:
+        """
+        Контрольное значение ключа для заголовка: HMAC от постоянной
+        строки, по которому пароль проверяется без расшифровки данных
+        """
+        return hmac.new(base64.urlsafe_b64decode(key), b'vault key check', 'sha256').digest()
 
-    def create_vault(self, master_password: str) -> bool:
+    @contextmanager
+    def _file_lock(self, exclusive: bool = False):
         """
-        Создание нового хранилища
+        Рекомендательная блокировка файла-спутника .lock между процессами:
+        разделяемая для чтения с диска, исключительная для записи.
+        Вложенный вызов внутри уже взятой блокировки не блокирует повторно
+        (разделяемая при необходимости повышается до исключительной).
+        Без fcntl (Windows) остается только блокировка потоков
+        """
+        with self._lock:
+            held = self._lock_mode
+            if fcntl is None or held == fcntl.LOCK_EX or (held and not exclusive):
+                yield
+                return
+
+            if self._lock_fd is None:
+                self._lock_fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o600)
+            mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+            fcntl.flock(self._lock_fd, mode)
+            self._lock_mode = mode
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_fd, held or fcntl.LOCK_UN)
+                self._lock_mode = held
+
+    def _version(self) -> tuple:
+        """
+        Версия прочитанного состояния: поколение снимка и размер журнала
+        """
+        journal = self._stamp[1] if self._stamp else None
+        return self._header.get('generation', 0), journal[1] if journal else 0
+
+    def _disk_version(self) -> tuple:
+        """
+        Версия состояния на диске. Снимок при каждой записи получает новое
+        поколение, а журнал между снимками только дописывается, поэтому
+        пара (поколение, размер журнала) меняется при любой записи
+        """
+        with open(self.vault_file, 'rb') as f:
+            generation = read_header(f).get('generation', 0)
+        journal = self._file_stamp(self.journal_file)
+        return generation, journal[1] if journal else 0
+
+    @staticmethod
+    def _file_stamp(path: str) -> Optional[tuple]:
+        """
+        Время изменения и размер файла
         """
         try:
-            key, salt = self._derive_key(master_password)
-            cipher = Fernet(key)
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
 
-            vault_data = {
-                'salt': base64.b64encode(salt).decode(),
-                'passwords': []
-            }
+    def _stamps(self) -> tuple:
+        """
+        Отметки снимка и журнала
+        """
+        return self._file_stamp(self.vault_file), self._file_stamp(self.journal_file)
+
+    def _read_header(self) -> Dict:
+        """
+        Заголовок файла хранилища вместе с зашифрованным индексом
+        """
+        with open(self.vault_file, 'rb') as f:
+            header = read_header(f)
+            if header['format'] >= FORMAT_BINARY:
+                f.seek(header['index_offset'])
+                header['index'] = f.read(header['index_length'])
+        return header
 
-            encrypted = cipher.encrypt(json.dumps(vault_data['passwords']).encode())
-            vault_data['passwords'] = base64.b64encode(encrypted).decode()
+    def _decrypt_entries(self, vault_data: Dict, cipher: Fernet) -> List[Dict]:
+        """
+        Расшифровка списка паролей из данных файла старого формата
+        """
+        encrypted = base64.b64decode(vault_data['passwords'])
+        return json.loads(cipher.decrypt(encrypted).decode())
 
-            with open(self.vault_file, 'w') as f:
-                json.dump(vault_data, f)
+    @staticmethod
+    def _decrypt_index(header: Dict, cipher: Fernet) -> List[tuple]:
+        """
+        Расшифровка индекса (id, смещение, длина) в порядке записей
+        """
+        if header['format'] == FORMAT_JSON_RECORDS:
+            return json.loads(cipher.decrypt(header['index'].encode()))
+        codec = get_codec(header['compression'])
+        return unpack_index(codec.decompress(cipher.decrypt(_token(header['index']))))
+
+    def _decrypt_snapshot(self, header: Dict) -> Dict[int, Dict]:
+        """
+        Расшифровка всех записей снимка любого формата в словарь по id
+        """
+        self._tokens = {}
+        self._services = None
+        self._search = None
+        if header['format'] == FORMAT_JSON:
+            self._index = None
+            self._codec = NONE
+            entries = self._decrypt_entries(header, self.cipher)
+        else:
+            index = self._decrypt_index(header, self.cipher)
+            places = self._locate(header, index)
+            self._index = {item[0]: place for item, place in zip(index, places)}
+            self._binary = header['format'] >= FORMAT_BINARY
+            self._codec = get_codec(header['compression'])
+            entries = []
+            for item, (entry, raw) in zip(index, self._decrypt_places(places)):
+                self._tokens[item[0]] = (entry, raw)
+                entries.append(entry)
+            # Повторные id из старых файлов получают новые номера, и до
+            # следующей записи снимка индекс файла им уже не соответствует
+            if len(self._index) != len(index):
+                self._index = None
+
+        mapping, self._next_id = _index_entries(entries, header.get('next_id', 1))
+        return mapping
+
+    def _shard_file(self, shard: int, generation: int) -> str:
+        """
+        Файл шарда, записанного в снимке данного поколения
+        """
+        return f"{self.vault_file}.shard{shard}.{generation}"
+
+    def _locate(self, header: Dict, index: List[tuple]) -> List[tuple]:
+        """
+        Расположение записей из индекса: файл (сам файл хранилища или
+        шард), смещение от начала этого файла и длина
+        """
+        generations = header.get('shard_generations')
+        if generations:
+            files = [self._shard_file(shard, g) for shard, g in enumerate(generations)]
+            return [(files[shard_of(entry_id, len(files))], start, length)
+                    for entry_id, start, length in index]
+        offset = header['records_offset']
+        return [(self.vault_file, offset + start, length) for _, start, length in index]
+
+    def _index_of(self, header: Dict, index: List[tuple]) -> Dict[int, tuple]:
+        """
+        Расположение записей по id
+        """
+        return {item[0]: place for item, place in zip(index, self._locate(header, index))}
+
+    def _decrypt_places(self, places: List[tuple]) -> List[tuple]:
+        """
+        Расшифровка записей по расположению в пары (запись, сырой токен).
+        Если записей много и они лежат в нескольких шардах, шарды
+        расшифровываются параллельно в пуле процессов
+        """
+        args = (self.key, self._codec.id, self._binary)
+        groups = {}
+        for n, place in enumerate(places):
+            groups.setdefault(place[0], []).append(n)
+        if len(groups) < 2 or len(places) < self.PARALLEL_MIN_RECORDS or self.workers < 2:
+            return _decrypt_records(*args, places)
 
-            self.key = key
-            self.cipher = cipher
-            self.unlocked = True
+        try:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            futures = [(ns, self._pool.submit(_decrypt_records, *args, [places[n] for n in ns]))
+                       for ns in groups.values()]
+            records = [None] * len(places)
+            for ns, future in futures:
+                for n, record in zip(ns, future.result()):
+                    records[n] = record
+            return records
+        except (OSError, BrokenExecutor):
+            # Пул процессов недоступен - расшифровка в своем процессе
+            self._pool = None
+            return _decrypt_records(*args, places)
+
+    @staticmethod
+    def _atomic_write(path: str, chunks: Iterable[bytes]):
+        """
+        Запись через временный файл, fsync и переименование; данные
+        пишутся по частям, без склейки всего файла в памяти
+        """
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.writelines(chunks)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _load(self) -> Dict[int, Dict]:
+        """
+        Рабочий набор записей: снимок плюс журнал. Снимок перечитывается и
+        расшифровывается только если изменились его время, размер или
+        счетчик поколений, из журнала дочитываются только новые записи
+        """
+        with self._lock:
+            # Внутри транзакции рабочий набор содержит еще не сохраненные
+            # изменения, и перечитывать его с диска нельзя
+            if self._pending is not None:
+                return self._entries
+
+            stamp = self._stamps()
+            if self._entries is not None and stamp == self._stamp:
+                return self._entries
+
+            with self._file_lock():
+                stamp = self._stamps()
+                previous = self._stamp or (None, None)
+                journal_size = stamp[1][1] if stamp[1] else 0
+                truncated = journal_size < self._journal_pos
+                if self._entries is None or stamp[0] != previous[0] or truncated:
+                    vault_data = self._read_header()
+                    if (self._entries is None or truncated or
+                            vault_data.get('generation', 0) != self._header.get('generation', 0)):
+                        self._entries = self._decrypt_snapshot(vault_data)
+                        self._journal_seq = vault_data.get('journal_seq', 0)
+                        self._journal_pos = 0
+                        self._journal_count = 0
+                    self._header = vault_data
+
+                self._replay_journal()
+                self._stamp = stamp
+            return self._entries
+
+    def _replay_journal(self):
+        """
+        Применение новых записей журнала к рабочему набору
+        """
+        if not os.path.exists(self.journal_file):
+            return
+
+        with open(self.journal_file, 'rb') as f:
+            f.seek(self._journal_pos)
+            for line in f:
+                # Недописанная или поврежденная запись завершает журнал
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(self.cipher.decrypt(line.rstrip(b'\n')))
+                except InvalidToken:
+                    break
+                if record['seq'] > self._journal_seq + 1:
+                    break
+
+                self._journal_pos += len(line)
+                if record['seq'] <= self._journal_seq:
+                    continue
+                self._apply_record(record)
+                self._journal_seq = record['seq']
+                self._journal_count += 1
+
+    def _apply_record(self, record: Dict) -> tuple:
+        """
+        Применение операции к рабочему набору с учетом счетчика id и
+        индекса по сервису
+        """
+        entry_id, previous = _apply(self._entries, record)
+        self._next_id = max(self._next_id, entry_id + 1)
+        if self._services is not None:
+            self._reindex_service(previous, self._entries.get(entry_id))
+        if self._search is not None:
+            self._reindex_search(entry_id)
+        return entry_id, previous
+
+    def _rollback(self, undo: List[tuple]):
+        """
+        Возврат рабочего набора к состоянию до неудачно сохраненных операций
+        """
+        for entry_id, previous in reversed(undo):
+            current = self._entries.get(entry_id)
+            if previous is None:
+                self._entries.pop(entry_id, None)
+            else:
+                self._entries[entry_id] = previous
+            if self._services is not None:
+                self._reindex_service(current, previous)
+            if self._search is not None:
+                self._reindex_search(entry_id)
+
+    def _reindex_search(self, entry_id: int):
+        """
+        Обновление поискового индекса по текущему состоянию записи
+        """
+        entry = self._entries.get(entry_id)
+        if entry is None:
+            self._search.remove(entry_id)
+        else:
+            self._search.put(entry)
+        self._search_dirty = True
+
+    def _reindex_service(self, old: Optional[Dict], new: Optional[Dict]):
+        """
+        Обновление индекса по сервису при замене записи old на new
+        """
+        if old is not None:
+            ids = self._services.get(old.get('service'))
+            if ids is not None:
+                ids.pop(old['id'], None)
+                if not ids:
+                    del self._services[old.get('service')]
+        if new is not None:
+            self._services.setdefault(new.get('service'), {})[new['id']] = None
+
+    def _save(self, entries: Dict[int, Dict]) -> bool:
+        """
+        Запись нового снимка в двоичном контейнере: каждая запись
+        сжимается и шифруется отдельно, причем для неизмененных записей
+        берется уже готовый токен; журнал, уже учтенный в снимке, удаляется.
+        В хранилище с шардами переписываются только шарды с измененными
+        записями и манифест
+        """
+        with self._lock:
+            try:
+                codec = self._target_codec()
+                # Готовые токены подходят, только если алгоритм сжатия не менялся
+                cache = self._tokens if codec is self._codec else {}
+                tokens = {}
+                for entry in entries.values():
+                    cached = cache.get(entry['id'])
+                    if cached is None or cached[0] is not entry:
+                        raw = _raw(self.cipher.encrypt(codec.compress(json.dumps(entry).encode())))
+                        cached = (entry, raw)
+                    tokens[entry['id']] = cached
+
+                # Шарды заменяемого снимка и его поколение берутся из файла:
+                # его мог записать другой процесс. Поколение нового снимка
+                # должно отличаться от записанного на диске, иначе другие
+                # процессы не заметят замену
+                try:
+                    with open(self.vault_file, 'rb') as f:
+                        replaced_header = read_header(f)
+                    replaced = replaced_header['shard_generations']
+                    replaced_generation = replaced_header.get('generation', 0)
+                except (OSError, ValueError):
+                    replaced = []
+                    replaced_generation = 0
+
+                generation = max(replaced_generation, self._header.get('generation', 0)) + 1
+                shards = self.shards if self.shards is not None else \
+                    len(self._header.get('shard_generations', ()))
+                body = []
+                places = None
+                if shards:
+                    places, shard_generations = self._save_shards(tokens, shards, generation,
+                                                                  replaced)
+                    index = [(entry_id, *places[entry_id][1:]) for entry_id in tokens]
+                else:
+                    shard_generations = []
+                    index = []
+                    position = 0
+                    for entry_id, (_, raw) in tokens.items():
+                        index.append((entry_id, position, len(raw)))
+                        body.append(raw)
+                        position += len(raw)
+
+                index_token = _raw(self.cipher.encrypt(codec.compress(pack_index(index))))
+                header = {
+                    'format': VERSION,
+                    'kdf': self._header.get('kdf', KDF_PBKDF2_SHA256),
+                    'iterations': self._header.get('iterations', KDF_ITERATIONS),
+                    'salt': self._header['salt'],
+                    'generation': generation,
+                    'journal_seq': self._journal_seq,
+                    'next_id': self._next_id,
+                    'index_length': len(index_token),
+                    'compression': codec.id,
+                    'check': self._key_check(self.key),
+                    'shard_generations': shard_generations
+                }
+                packed = pack_header(header)
+                self._atomic_write(self.vault_file, [packed, index_token] + body)
+                if os.path.exists(self.journal_file):
+                    os.remove(self.journal_file)
+
+                # Шарды, на которые манифест больше не ссылается
+                current = {self._shard_file(shard, g) for shard, g in enumerate(shard_generations)}
+                for shard, g in enumerate(replaced):
+                    path = self._shard_file(shard, g)
+                    if path not in current and os.path.exists(path):
+                        os.remove(path)
+
+                header.update(index=index_token, index_offset=len(packed),
+                              records_offset=len(packed) + len(index_token))
+                self._header = header
+                self._entries = entries
+                self._index = places or self._index_of(header, index)
+                self._binary = True
+                self._codec = codec
+                self._tokens = tokens
+                self._journal_pos = 0
+                self._journal_count = 0
+                self._stamp = self._stamps()
+                return True
+            except Exception:
+                return False
+
+    def _save_shards(self, tokens: Dict[int, tuple], shards: int, generation: int,
+                     previous: List[int]) -> tuple:
+        """
+        Запись файлов шардов для нового снимка вместо шардов previous.
+        Шард, в котором ни одна запись не добавлена, не изменена и не
+        удалена, остается прежним файлом. Возвращает расположение записей
+        (файл шарда, смещение, длина) и поколения шардов
+        """
+        groups = [[] for _ in range(shards)]
+        for entry_id in tokens:
+            groups[shard_of(entry_id, shards)].append(entry_id)
+
+        counts = {}
+        if (self._index is not None and len(previous) == shards and
+                self._header.get('shard_generations') == previous):
+            for path, _, _ in self._index.values():
+                counts[path] = counts.get(path, 0) + 1
+
+        places = {}
+        generations = []
+        for shard, ids in enumerate(groups):
+            if counts:
+                path = self._shard_file(shard, previous[shard])
+                if counts.get(path, 0) == len(ids) and all(
+                        tokens[i] is self._tokens.get(i) and self._index[i][0] == path
+                        for i in ids):
+                    places.update((i, self._index[i]) for i in ids)
+                    generations.append(previous[shard])
+                    continue
+
+            path = self._shard_file(shard, generation)
+            position = 0
+            chunks = []
+            for entry_id in ids:
+                raw = tokens[entry_id][1]
+                places[entry_id] = (path, position, len(raw))
+                chunks.append(raw)
+                position += len(raw)
+            self._atomic_write(path, chunks)
+            generations.append(generation)
+        return places, generations
+
+    def _target_codec(self) -> Codec:
+        """
+        Алгоритм сжатия для записи снимка: заданный явно или тот, которым
+        сжат текущий файл
+        """
+        if self.compression:
+            return codec_by_name(self.compression)
+        return self._codec
+
+    def _append_journal(self, records: List[Dict]) -> bool:
+        """
+        Дописывание операций в журнал: каждая шифруется отдельно
+        """
+        with self._lock:
+            try:
+                seq = self._journal_seq
+                lines = []
+                for record in records:
+                    seq += 1
+                    token = self.cipher.encrypt(json.dumps(dict(record, seq=seq)).encode())
+                    lines.append(token + b'\n')
+                data = b''.join(lines)
+
+                # Хвост после последней целой записи (обрыв при сбое) отрезается
+                stamp = self._file_stamp(self.journal_file)
+                if stamp and stamp[1] > self._journal_pos:
+                    os.truncate(self.journal_file, self._journal_pos)
+
+                with open(self.journal_file, 'ab') as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                self._journal_seq = seq
+                self._journal_pos += len(data)
+                self._journal_count += len(records)
+                self._stamp = self._stamps()
+            except Exception:
+                return False
+
+        self._maybe_compact()
+        return True
+
+    def _maybe_compact(self):
+        """
+        Фоновое уплотнение журнала при превышении порогов
+        """
+        snapshot_size = self._stamp[0][1] if self._stamp and self._stamp[0] else 0
+        too_many = self._journal_count >= self.COMPACT_RECORDS
+        too_big = (self._journal_pos >= self.COMPACT_MIN_BYTES and
+                   self._journal_pos > snapshot_size * self.COMPACT_RATIO)
+        if not (too_many or too_big):
+            return
+
+        if self._compactor is None or not self._compactor.is_alive():
+            self._compactor = threading.Thread(target=self.compact, daemon=True)
+            self._compactor.start()
+
+    def compact(self) -> bool:
+        """
+        Свертка журнала в новый снимок
+        """
+        with self._lock, self._file_lock(exclusive=True):
+            if not self.unlocked:
+                return False
+            try:
+                entries = self._load()
+            except Exception:
+                return False
+            if not self._save(entries):
+                return False
+            if self._search is not None:
+                self._write_search_index()
+            return True
+
+    def create_vault(self, master_password: str) -> bool:
+        """
+        Создание нового хранилища
+        """
+        try:
+            key, salt = self._derive_key(master_password)
+
+            with self._lock, self._file_lock(exclusive=True):
+                self.key = key
+                self.cipher = Fernet(key)
+                self._header = {
+                    'format': VERSION,
+                    'kdf': KDF_PBKDF2_SHA256,
+                    'iterations': KDF_ITERATIONS,
+                    'salt': salt,
+                    'generation': 0
+                }
+                self._tokens = {}
+                self._codec = get_codec(DEFAULT_COMPRESSION)
+                self._next_id = 1
+                self._services = None
+                self._search = None
+                self._search_dirty = False
+                self._journal_seq = 0
+                if not self._save({}):
+                    raise OSError("Не удалось записать файл хранилища")
+                if os.path.exists(self.index_file):
+                    os.remove(self.index_file)
+                self.unlocked = True
             return True
         except Exception as e:
+            self.lock_vault()
             print(f"Ошибка создания хранилища: {e}")
             return False
 
@@ -70,31 +769,117 @@ class PasswordVault:
         Разблокировка хранилища
         """
         try:
-            if not os.path.exists(self.vault_file):
+            params = self.kdf_params()
+            if params is None:
                 return False
+            key, _ = self._derive_key(master_password, *params)
+        except Exception:
+            return False
+        return self.unlock_with_key(key)
 
-            with open(self.vault_file, 'r') as f:
-                vault_data = json.load(f)
+    def kdf_params(self) -> Optional[tuple]:
+        """
+        Соль и число итераций KDF из заголовка хранилища (None, если
+        хранилища нет)
+        """
+        if not os.path.exists(self.vault_file):
+            return None
+        with self._file_lock(), open(self.vault_file, 'rb') as f:
+            header = read_header(f)
+        return header['salt'], header['iterations']
+
+    def unlock_with_key(self, key: bytes) -> bool:
+        """
+        Разблокировка уже полученным ключом: derive_key с параметрами из
+        kdf_params можно вычислить отдельно, например в другом процессе
+        """
+        try:
+            with self._file_lock():
+                stamp = self._stamps()
+                vault_data = self._read_header()
 
-            salt = base64.b64decode(vault_data['salt'])
-            key, _ = self._derive_key(master_password, salt)
             cipher = Fernet(key)
 
-            encrypted = base64.b64decode(vault_data['passwords'])
-            cipher.decrypt(encrypted)
+            # Пароль проверяется по контрольному значению из заголовка, а в
+            # файлах без него - расшифровкой индекса (в самом старом формате -
+            # всего списка). Индекс и записи расшифровываются только при
+            # первом обращении к ним
+            index, entries = None, None
+            if vault_data['check'] is not None:
+                if not hmac.compare_digest(vault_data['check'], self._key_check(key)):
+                    return False
+            elif vault_data['format'] == FORMAT_JSON:
+                entries, next_id = _index_entries(self._decrypt_entries(vault_data, cipher))
+            else:
+                index = self._decrypt_index(vault_data, cipher)
+
+            with self._lock:
+                self.key = key
+                self.cipher = cipher
+                self.unlocked = True
+                self._header = vault_data
+                self._entries = entries
+                self._index = None
+                self._tokens = {}
+                self._services = None
+                self._search = None
+                self._search_dirty = False
+                self._journal_seq = vault_data.get('journal_seq', 0)
+                self._journal_pos = 0
+                self._journal_count = 0
+                if entries is None:
+                    self._binary = vault_data['format'] >= FORMAT_BINARY
+                    self._codec = get_codec(vault_data['compression'])
+                    # Записи еще не расшифрованы, и счетчик id берется из
+                    # заголовка, чтобы id удаленных записей не выдавались снова
+                    self._next_id = vault_data.get('next_id', 1)
+                else:
+                    self._next_id = next_id
+                if index is not None:
+                    self._index = self._index_of(vault_data, index)
+                self._stamp = (stamp[0], None)
+                if entries is not None or (index is not None and len(self._index) != len(index)):
+                    self._load()
+                else:
+                    self._stamp = stamp
 
-            self.key = key
-            self.cipher = cipher
-            self.unlocked = True
+                # Старые JSON-файлы сразу переписываются в двоичный контейнер.
+                # Запись идет под исключительной блокировкой: если после
+                # чтения другой процесс дописал журнал или уже переписал
+                # файл, состояние сначала перечитывается
+                if vault_data['format'] < FORMAT_BINARY:
+                    with self._file_lock(exclusive=True):
+                        if self._disk_version() != self._version():
+                            self._load()
+                        if self._header['format'] < FORMAT_BINARY:
+                            self._save(self._load())
             return True
         except Exception:
             return False
 
     def lock_vault(self):
         """Блокировка хранилища"""
-        self.key = None
-        self.cipher = None
-        self.unlocked = False
+        with self._lock:
+            if self._search is not None and self._search_dirty and self._pending is None:
+                self._write_search_index()
+            self.key = None
+            self.cipher = None
+            self.unlocked = False
+            self._header = None
+            self._entries = None
+            self._index = None
+            self._tokens = {}
+            self._next_id = 1
+            self._services = None
+            self._search = None
+            self._search_dirty = False
+            self._stamp = None
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+            if self._lock_fd is not None and not self._lock_mode:
+                os.close(self._lock_fd)
+                self._lock_fd = None
 
     def get_passwords(self) -> List[Dict]:
         """
@@ -104,15 +889,210 @@ class PasswordVault:
             return []
 
         try:
-            with open(self.vault_file, 'r') as f:
-                vault_data = json.load(f)
+            return [dict(p) for p in self._load().values()]
+        except Exception:
+            return []
+
+    def get_password(self, password_id: int) -> Optional[Dict]:
+        """
+        Получение одного пароля по id. Пока записи не расшифрованы целиком
+        и журнал пуст, запись читается из отображенного в память файла по
+        смещению из индекса и расшифровывается только она
+        """
+        if not self.unlocked:
+            return None
+
+        try:
+            found = self._get_many([password_id])
+            return found[0] if found else None
+        except Exception:
+            return None
+
+    def _get_many(self, ids: List[int]) -> List[Dict]:
+        """
+        Копии записей с данными id (отсутствующие пропускаются).
+
+        Под блокировками из файла только копируются токены, а
+        расшифровываются они уже без блокировки, так что чтения из разных
+        потоков не ждут друг друга. Разделяемая блокировка файла не дает
+        другому процессу удалить файлы шардов, пока токены копируются
+        """
+        with self._lock, self._file_lock():
+            index = self._records_index()
+            if index is None:
+                entries = self._load()
+                return [dict(entries[i]) for i in ids if i in entries]
+            tokens = _read_raw([index[i] for i in ids if i in index])
+            cipher, codec, binary = self.cipher, self._codec, self._binary
+        return [entry for entry, _ in _decrypt_raw(cipher, codec, binary, tokens)]
+
+    def search(self, query: str, field: Optional[str] = None, mode: str = 'substring',
+               limit: int = 50) -> List[Dict]:
+        """
+        Поиск по сервису, логину и заметкам: mode - prefix, substring или
+        fuzzy, field - одно из полей или None для всех.
+
+        Индекс хранится рядом с хранилищем в зашифрованном файле и
+        загружается при первом поиске; дальше он обновляется вместе с
+        записями, а на диск записывается при свертке журнала и блокировке.
+        """
+        if not self.unlocked:
+            return []
+
+        with self._lock:
+            try:
+                index = self._search_index()
+            except Exception:
+                return []
+            ids = index.search(query, field, mode, limit)
+        try:
+            return self._get_many(ids)
+        except Exception:
+            return []
+
+    def _search_index(self) -> SearchIndex:
+        """
+        Поисковый индекс: уже загруженный, сохраненный или построенный
+        заново по всем записям, если сохраненный устарел
+        """
+        if self._pending is None and self._records_index() is None:
+            self._load()
+
+        if self._search is None and self._pending is None:
+            self._search = self._read_search_index()
+            self._search_dirty = False
+        if self._search is None:
+            self._search = SearchIndex(self._load().values())
+            self._search_dirty = True
+            if self._pending is None:
+                self._write_search_index()
+        return self._search
+
+    def _read_search_index(self) -> Optional[SearchIndex]:
+        """
+        Сохраненный индекс, если он построен для текущего снимка; операции
+        журнала, записанные после него, применяются к нему напрямую
+        """
+        try:
+            with open(self.index_file, 'rb') as f:
+                state = json.loads(self.cipher.decrypt(f.read()))
+        except (OSError, ValueError, InvalidToken):
+            return None
+
+        if (state['generation'] != self._header.get('generation', 0) or
+                state['journal_seq'] > self._journal_seq):
+            return None
 
-            encrypted = base64.b64decode(vault_data['passwords'])
-            decrypted = self.cipher.decrypt(encrypted)
-            return json.loads(decrypted.decode())
+        index = SearchIndex.load(state['index'])
+        seq = state['journal_seq']
+        if seq < self._journal_seq and os.path.exists(self.journal_file):
+            with open(self.journal_file, 'rb') as f:
+                for line in f:
+                    try:
+                        record = json.loads(self.cipher.decrypt(line.rstrip(b'\n')))
+                    except InvalidToken:
+                        break
+                    if record['seq'] > self._journal_seq:
+                        break
+                    if record['seq'] == seq + 1:
+                        index.apply(record)
+                        seq = record['seq']
+        return index if seq == self._journal_seq else None
+
+    def _write_search_index(self):
+        """
+        Сохранение поискового индекса вместе с отметкой о состоянии
+        хранилища, которому он соответствует
+        """
+        try:
+            state = {
+                'generation': self._header.get('generation', 0),
+                'journal_seq': self._journal_seq,
+                'index': self._search.dump()
+            }
+            self._atomic_write(self.index_file, [self.cipher.encrypt(json.dumps(state).encode())])
+            self._search_dirty = False
+        except Exception as e:
+            print(f"Ошибка сохранения поискового индекса: {e}")
+
+    def find_by_service(self, service: str) -> List[Dict]:
+        """
+        Все пароли для сервиса. Индекс по сервису строится при первом
+        вызове и дальше обновляется вместе с записями
+        """
+        if not self.unlocked:
+            return []
+
+        try:
+            with self._lock:
+                entries = self._load()
+                if self._services is None:
+                    self._services = {}
+                    for entry in entries.values():
+                        self._reindex_service(None, entry)
+                return [dict(entries[i]) for i in self._services.get(service, ())]
         except Exception:
             return []
 
+    def _records_index(self) -> Optional[Dict[int, tuple]]:
+        """
+        Индекс для чтения отдельных записей из файла, пока записи не
+        расшифрованы целиком и журнал пуст, иначе None. Индекс
+        расшифровывается при первом обращении и перечитывается, если
+        снимок изменился
+        """
+        with self._lock:
+            stamp = self._stamps()
+            if self._entries is not None or stamp[1] is not None:
+                return None
+            if self._index is None or stamp != self._stamp:
+                with self._file_lock():
+                    self._refresh_index(self._stamps())
+            return self._index
+
+    def _refresh_index(self, stamp: tuple):
+        """
+        Расшифровка индекса снимка без расшифровки записей; заголовок
+        перечитывается, только если снимок изменился
+        """
+        vault_data = self._header if stamp == self._stamp else self._read_header()
+        if vault_data['format'] == FORMAT_JSON:
+            self._load()
+            return
+
+        index = self._decrypt_index(vault_data, self.cipher)
+        if vault_data.get('generation', 0) != self._header.get('generation', 0):
+            self._search = None
+            self._search_dirty = False
+        self._header = vault_data
+        self._index = self._index_of(vault_data, index)
+        if len(self._index) != len(index):
+            self._index = None
+            self._load()
+            return
+        self._binary = vault_data['format'] >= FORMAT_BINARY
+        self._codec = get_codec(vault_data['compression'])
+        self._journal_seq = vault_data.get('journal_seq', 0)
+        self._stamp = stamp
+
+    def iter_passwords(self, chunk_size: int = 1000) -> Iterator[List[Dict]]:
+        """
+        Все пароли порциями по chunk_size копий; в памяти одновременно
+        копии только одной порции. Пока записи не расшифрованы целиком и
+        журнал пуст, каждая порция читается и расшифровывается из файла
+        по индексу, и хранилище целиком не расшифровывается
+        """
+        if not self.unlocked:
+            return
+
+        with self._lock:
+            index = self._records_index()
+            ids = list(index if index is not None else self._load())
+        for start in range(0, len(ids), chunk_size):
+            with self._lock:
+                chunk = self._get_many(ids[start:start + chunk_size])
+            yield chunk
+
     def save_passwords(self, passwords: List[Dict]) -> bool:
         """
         Сохранение паролей в хранилище
@@ -120,58 +1100,268 @@ class PasswordVault:
         if not self.unlocked:
             return False
 
+        with self._lock, self._file_lock(exclusive=True):
+            # Весь набор заменяется целиком, так что объединять нечего:
+            # при конфликте либо отказ, либо перезапись чужих изменений.
+            # Перед перезаписью состояние перечитывается, чтобы заголовок,
+            # счетчик id и журнал соответствовали файлу на диске
+            try:
+                if self._disk_version() != self._version():
+                    if self.on_conflict == 'fail':
+                        print("Хранилище изменено другим процессом")
+                        return False
+                    self._load()
+            except Exception:
+                return False
+            entries, self._next_id = _index_entries([dict(p) for p in passwords], self._next_id)
+            self._services = None
+            self._search = None
+            return self._save(entries)
+
+    def _current(self) -> Optional[Dict[int, Dict]]:
+        """
+        Рабочий набор записей (None при ошибке)
+        """
+        if not self.unlocked:
+            return None
         try:
-            with open(self.vault_file, 'r') as f:
-                vault_data = json.load(f)
+            return self._load()
+        except Exception:
+            return None
 
-            encrypted = self.cipher.encrypt(json.dumps(passwords).encode())
-            vault_data['passwords'] = base64.b64encode(encrypted).decode()
+    def _commit(self, records: List[Dict]) -> bool:
+        """
+        Применение операций к рабочему набору на месте и их сохранение:
+        запись в журнал в журнальном режиме, иначе новый снимок. Если
+        сохранить не удалось, операции откатываются
+        """
+        with self._lock:
+            entries = self._current()
+            if entries is None:
+                return False
 
-            with open(self.vault_file, 'w') as f:
-                json.dump(vault_data, f)
+            applied = []
+            undo = []
+            for record in records:
+                # Пока рабочий набор перечитывался, id новой записи мог
+                # занять другой процесс
+                if record['op'] == 'add' and record['entry']['id'] < self._next_id:
+                    record = dict(record, entry=dict(record['entry'], id=self._next_id))
+                applied.append(record)
+                undo.append(self._apply_record(record))
+            records = applied
+            if self._pending is not None:
+                pending = self._pending
+                pending[1].extend(undo)
+                if pending[0] is not None:
+                    pending[0].extend(records)
+                    # Такой пакет все равно запишется снимком, а для
+                    # объединения с изменениями других процессов операции
+                    # восстанавливаются по списку отката, поэтому дальше
+                    # они не копятся
+                    if len(pending[0]) >= self.COMPACT_RECORDS:
+                        pending[0] = None
+                return True
+            try:
+                return self._persist(records, undo)
+            except VaultConflictError as e:
+                print(f"Ошибка сохранения: {e}")
+                return False
 
-            return True
-        except Exception:
-            return False
+    def _persist(self, records: Optional[List[Dict]], undo: List[tuple]) -> bool:
+        """
+        Сохранение уже примененных операций одной записью на диск: в
+        журнал, если он включен и операций немного, иначе новым снимком
+        (records=None - операции не сохранялись, только список отката).
+
+        Запись идет под исключительной блокировкой файла. Если с момента
+        чтения другой процесс успел что-то записать, операции либо
+        применяются заново поверх его изменений, либо (on_conflict='fail')
+        откатываются с VaultConflictError
+        """
+        with self._file_lock(exclusive=True):
+            try:
+                changed = self._disk_version() != self._version()
+                if changed:
+                    records, undo = self._merge(records, undo)
+            except VaultConflictError:
+                raise
+            except Exception:
+                self._rollback(undo)
+                return False
+
+            if self.journal and records is not None and len(records) < self.COMPACT_RECORDS:
+                saved = self._append_journal(records)
+            else:
+                saved = self._save(self._entries)
+            if not saved:
+                self._rollback(undo)
+            return saved
+
+    def _merge(self, records: Optional[List[Dict]], undo: List[tuple]) -> tuple:
+        """
+        Повторное применение операций к состоянию, записанному другим
+        процессом: свои операции откатываются, состояние перечитывается
+        с диска, и операции применяются заново. Новые записи получают
+        свободные id (тот же id мог занять другой процесс); изменения и
+        удаления записей, удаленных другим процессом, пропускаются.
+        Возвращает операции с новыми id и список для их отката
+        """
+        if records is None:
+            records = self._changes(undo)
+        self._rollback(undo)
+        if self.on_conflict == 'fail':
+            raise VaultConflictError("Хранилище изменено другим процессом")
+
+        self._load()
+        merged = []
+        undo = []
+        ids = {}
+        for record in records:
+            if record['op'] == 'add':
+                entry = dict(record['entry'], id=self._next_id)
+                ids[record['entry']['id']] = entry['id']
+                record = dict(record, entry=entry)
+            else:
+                record = dict(record, id=ids.get(record['id'], record['id']))
+            merged.append(record)
+            undo.append(self._apply_record(record))
+        return merged, undo
+
+    def _changes(self, undo: List[tuple]) -> List[Dict]:
+        """
+        Операции с тем же итогом, что и уже примененные: для каждой
+        затронутой записи ее состояние до пакета из списка отката
+        сравнивается с текущим
+        """
+        original = {}
+        for entry_id, previous in undo:
+            original.setdefault(entry_id, previous)
+
+        records = []
+        for entry_id, previous in original.items():
+            current = self._entries.get(entry_id)
+            if previous is None and current is not None:
+                records.append({'op': 'add', 'entry': current})
+            elif previous is not None and current is None:
+                records.append({'op': 'delete', 'id': entry_id})
+            elif current is not previous:
+                fields = {k: v for k, v in current.items() if previous.get(k) != v}
+                if fields:
+                    records.append({'op': 'update', 'id': entry_id, 'fields': fields})
+        return records
+
+    @contextmanager
+    def transaction(self):
+        """
+        Пакет изменений с одной записью на диск:
+
+            with vault.transaction():
+                vault.add_password(...)
+                vault.delete_password(...)
+
+        Операции сразу видны через методы чтения, а сохраняются одним
+        проходом шифрования и одной атомарной записью при выходе из блока.
+        При исключении внутри блока все изменения откатываются. Вложенная
+        транзакция становится частью внешней
+        """
+        with self._lock:
+            if self._pending is not None:
+                yield self
+                return
+
+            if self._current() is None:
+                raise VaultError("Хранилище заблокировано")
+
+            self._pending = [[], []]
+            try:
+                yield self
+            except BaseException:
+                undo = self._pending[1]
+                self._pending = None
+                self._rollback(undo)
+                raise
+
+            records, undo = self._pending
+            self._pending = None
+            if undo and not self._persist(records, undo):
+                raise VaultError("Не удалось сохранить изменения")
 
     def add_password(self, service: str, username: str, password: str, notes: str = "") -> bool:
         """
         Добавление нового пароля
         """
-        passwords = self.get_passwords()
+        with self._lock:
+            if self._current() is None:
+                return False
+
+            # Счетчик id хранится в снимке и только растет, поэтому id
+            # удаленных записей не выдаются повторно
+            new_entry = {
+                'id': self._next_id,
+                'service': service,
+                'username': username,
+                'password': password,
+                'notes': notes,
+                'created_at': datetime.now().strftime("%Y-%m-%d %H:%M"),
+                'updated_at': datetime.now().strftime("%Y-%m-%d %H:%M")
+            }
 
-        new_entry = {
-            'id': len(passwords) + 1,
-            'service': service,
-            'username': username,
-            'password': password,
-            'notes': notes,
-            'created_at': datetime.now().strftime("%Y-%m-%d %H:%M"),
-            'updated_at': datetime.now().strftime("%Y-%m-%d %H:%M")
-        }
+            return self._commit([{'op': 'add', 'entry': new_entry}])
 
-        passwords.append(new_entry)
-        return self.save_passwords(passwords)
+    def add_many(self, entries: Iterable[Dict]) -> bool:
+        """
+        Добавление многих паролей одной транзакцией; каждая запись - словарь
+        с полями service, username, password и notes
+        """
+        try:
+            with self.transaction():
+                for entry in entries:
+                    if not self.add_password(entry['service'], entry.get('username', ''),
+                                             entry['password'], entry.get('notes', '')):
+                        raise VaultError("Не удалось добавить запись")
+            return True
+        except Exception:
+            return False
+
+    def update_many(self, changes: Dict[int, Dict]) -> bool:
+        """
+        Обновление многих паролей одной транзакцией: id -> новые значения полей
+        """
+        try:
+            with self.transaction():
+                for password_id, fields in changes.items():
+                    if not self.update_password(password_id, **fields):
+                        raise VaultError("Не удалось обновить запись")
+            return True
+        except Exception:
+            return False
+
+    def delete_many(self, password_ids: Iterable[int]) -> bool:
+        """
+        Удаление многих паролей одной транзакцией
+        """
+        try:
+            with self.transaction():
+                for password_id in password_ids:
+                    if not self.delete_password(password_id):
+                        raise VaultError("Не удалось удалить запись")
+            return True
+        except Exception:
+            return False
 
     def delete_password(self, password_id: int) -> bool:
         """
         Удаление пароля
         """
-        passwords = self.get_passwords()
-        passwords = [p for p in passwords if p['id'] != password_id]
-        return self.save_passwords(passwords)
+        return self._commit([{'op': 'delete', 'id': password_id}])
 
     def update_password(self, password_id: int, **kwargs) -> bool:
         """
         Обновление пароля
         """
-        passwords = self.get_passwords()
-        for password in passwords:
-            if password['id'] == password_id:
-                password.update(kwargs)
-                password['updated_at'] = datetime.now().strftime("%Y-%m-%d %H:%M")
-                break
-        return self.save_passwords(passwords)
+        fields = dict(kwargs, updated_at=datetime.now().strftime("%Y-%m-%d %H:%M"))
+        return self._commit([{'op': 'update', 'id': password_id, 'fields': fields}])
 
 
-vault = PasswordVault()
\ No newline at end of file
+vault = PasswordVault()
@@ -0,0 +1,137 @@
+import base64
+import json
+import struct
+from typing import BinaryIO, Dict, List
+
+# Двоичный контейнер хранилища:
+#
+#   заголовок фиксированного размера | зашифрованный индекс | записи
+#
+# Индекс и записи - токены Fernet в сыром виде (без base64), так что файл
+# можно отобразить в память и расшифровывать записи по смещениям из индекса.
+#
+# С версии 6 записи можно разделить на шарды. Тогда файл хранилища -
+# манифест: заголовок, таблица поколений шардов и индекс, а записи лежат
+# в файлах шардов (только токены подряд, смещения в индексе - от начала
+# файла шарда). Шард записи определяется хешем ее id
+MAGIC = b'PWVAULT\x00'
+VERSION = 6
+
+# Первая версия двоичного контейнера
+FORMAT_BINARY = 3
+
+KDF_PBKDF2_SHA256 = 1
+KDF_ITERATIONS = 100000
+
+# Поля заголовка после magic и версии: размер заголовка, KDF, число
+# итераций, соль, поколение снимка, номер последней операции журнала
+# в снимке, следующий id, длина зашифрованного индекса; с версии 4 -
+# алгоритм сжатия записей и индекса, с версии 5 - контрольное значение
+# ключа для проверки мастер-пароля, с версии 6 - число шардов (0 - записи
+# в самом файле)
+_FIELDS = ('header_size', 'kdf', 'iterations', 'salt', 'generation', 'journal_seq',
+           'next_id', 'index_length', 'compression', 'check', 'shards')
+_LAYOUTS = {
+    3: (struct.Struct('<8sHHBI16sQQQQ'), 8),
+    4: (struct.Struct('<8sHHBI16sQQQQB'), 9),
+    5: (struct.Struct('<8sHHBI16sQQQQB32s'), 10),
+    6: (struct.Struct('<8sHHBI16sQQQQB32sH'), 11)
+}
+_HEADER = _LAYOUTS[VERSION][0]
+_VERSION = struct.Struct('<8sH')
+
+# Элемент индекса: id, смещение от начала области записей, длина
+_INDEX_ITEM = struct.Struct('<QQI')
+
+# Таблица после заголовка: поколение снимка, в котором записан каждый шард
+_SHARD_ITEM = struct.Struct('<Q')
+_SHARD_MIX = 0x9E3779B97F4A7C15
+
+# Форматы старых JSON-файлов: весь список одним токеном и построчный
+# (строка JSON-заголовка с индексом, за ней токены записей в base64)
+FORMAT_JSON = 1
+FORMAT_JSON_RECORDS = 2
+
+
+def pack_header(header: Dict) -> bytes:
+    """
+    Заголовок контейнера в двоичном виде
+    """
+    return _HEADER.pack(
+        MAGIC, VERSION, _HEADER.size,
+        header.get('kdf', KDF_PBKDF2_SHA256), header.get('iterations', KDF_ITERATIONS),
+        header['salt'], header['generation'], header['journal_seq'], header['next_id'],
+        header['index_length'], header.get('compression', 0), header.get('check') or bytes(32),
+        len(header.get('shard_generations', ()))
+    ) + b''.join(_SHARD_ITEM.pack(g) for g in header.get('shard_generations', ()))
+
+
+def read_header(f: BinaryIO) -> Dict:
+    """
+    Заголовок файла хранилища любого формата в виде словаря: для
+    контейнера - поля заголовка и смещения индекса и записей, для старых
+    JSON-файлов - их данные с солью в байтах и смещением записей.
+    Отсутствующие в старых версиях поля: сжатие 0, контрольное значение None,
+    шардов нет (пустой список поколений shard_generations)
+    """
+    prefix = f.read(_HEADER.size)
+    if prefix.startswith(MAGIC):
+        version = _VERSION.unpack_from(prefix)[1] if len(prefix) >= _VERSION.size else 0
+        if version not in _LAYOUTS:
+            raise ValueError(f"Версия хранилища {version} не поддерживается")
+        layout, count = _LAYOUTS[version]
+        if len(prefix) < layout.size:
+            raise ValueError("Заголовок хранилища обрезан")
+        header = {'format': version, 'compression': 0, 'check': None, 'shards': 0}
+        header.update(zip(_FIELDS[:count], layout.unpack_from(prefix)[2:]))
+        if header['check'] == bytes(32):
+            header['check'] = None
+        table = _SHARD_ITEM.size * header.pop('shards')
+        if table:
+            f.seek(header['header_size'])
+            data = f.read(table)
+            if len(data) < table:
+                raise ValueError("Таблица шардов обрезана")
+            header['shard_generations'] = [g for g, in _SHARD_ITEM.iter_unpack(data)]
+        else:
+            header['shard_generations'] = []
+        header['header_size'] += table
+        header['index_offset'] = header['header_size']
+        header['records_offset'] = header['header_size'] + header['index_length']
+        return header
+
+    f.seek(0)
+    line = f.readline()
+    header = json.loads(line)
+    header['format'] = header.get('format', FORMAT_JSON)
+    header['kdf'] = KDF_PBKDF2_SHA256
+    header['iterations'] = KDF_ITERATIONS
+    header['salt'] = base64.b64decode(header['salt'])
+    header['compression'] = 0
+    header['check'] = None
+    header['shard_generations'] = []
+    header['records_offset'] = len(line)
+    return header
+
+
+def shard_of(entry_id: int, shards: int) -> int:
+    """
+    Номер шарда записи: id перемешивается умножением (хеширование
+    Фибоначчи), чтобы записи, добавленные подряд, расходились по разным
+    шардам
+    """
+    return (((entry_id * _SHARD_MIX) & 0xFFFFFFFFFFFFFFFF) >> 32) % shards
+
+
+def pack_index(items: List[tuple]) -> bytes:
+    """
+    Индекс [(id, смещение, длина), ...] в двоичном виде
+    """
+    return b''.join(_INDEX_ITEM.pack(*item) for item in items)
+
+
+def unpack_index(data: bytes) -> List[tuple]:
+    """
+    Обратное преобразование к pack_index
+    """
+    return list(_INDEX_ITEM.iter_unpack(data))
@@ -0,0 +1,153 @@
+import csv
+import json
+import os
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from vault import PasswordVault, VaultError
+
+# Поля записи, которые читаются при импорте и пишутся при экспорте
+IMPORT_FIELDS = ('service', 'username', 'password', 'notes')
+EXPORT_FIELDS = ('id', 'service', 'username', 'password', 'notes', 'created_at', 'updated_at')
+
+CHUNK_SIZE = 1000
+
+FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+
+
+def detect_format(path: str, fmt: Optional[str] = None) -> str:
+    """
+    Формат файла: заданный явно или по расширению
+    """
+    if fmt:
+        if fmt not in ('csv', 'jsonl'):
+            raise ValueError(f"Неизвестный формат: {fmt}")
+        return fmt
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(f"Не удалось определить формат файла: {path}")
+    return FORMATS[ext]
+
+
+def _columns(fields: tuple, mapping: Optional[Dict[str, str]]) -> Dict[str, str]:
+    """
+    Соответствие поле хранилища -> колонка файла; пустое имя колонки
+    исключает поле
+    """
+    columns = {field: field for field in fields}
+    columns.update(mapping or {})
+    return {field: column for field, column in columns.items() if column}
+
+
+def _read_rows(f, fmt: str) -> Iterator[Dict]:
+    """
+    Построчное чтение записей из CSV или JSONL
+    """
+    if fmt == 'csv':
+        yield from csv.DictReader(f)
+        return
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[List]:
+    """
+    Разбиение потока на порции по size элементов
+    """
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _stats(records: int, skipped: int, start: float) -> Dict:
+    """
+    Итог переноса: число записей, время и скорость в записях в секунду
+    """
+    seconds = time.perf_counter() - start
+    return {
+        'records': records,
+        'skipped': skipped,
+        'seconds': seconds,
+        'rate': records / seconds if seconds else 0.0
+    }
+
+
+def import_records(vault: PasswordVault, path: str, fmt: Optional[str] = None,
+                   mapping: Optional[Dict[str, str]] = None, chunk_size: int = CHUNK_SIZE,
+                   progress: Optional[Callable[[int, float], None]] = None) -> Dict:
+    """
+    Потоковый импорт из CSV или JSONL.
+
+    mapping задает колонку (ключ) входного файла для поля хранилища,
+    например {'service': 'url', 'username': 'login'}. Файл читается
+    порциями по chunk_size записей, все порции входят в одну транзакцию
+    и сохраняются одной записью; при ошибке хранилище не меняется.
+    Строки без сервиса или пароля пропускаются. progress получает число
+    импортированных записей и прошедшее время в секундах.
+    """
+    fmt = detect_format(path, fmt)
+    columns = _columns(IMPORT_FIELDS, mapping)
+    records = skipped = 0
+    start = time.perf_counter()
+
+    with open(path, 'r', newline='', encoding='utf-8') as f, vault.transaction():
+        for rows in _chunks(_read_rows(f, fmt), chunk_size):
+            batch = []
+            for row in rows:
+                entry = {field: str(row.get(column) or '') for field, column in columns.items()}
+                if entry.get('service') and entry.get('password'):
+                    batch.append(entry)
+                else:
+                    skipped += 1
+
+            if not vault.add_many(batch):
+                raise VaultError("Не удалось добавить записи")
+            records += len(batch)
+            if progress:
+                progress(records, time.perf_counter() - start)
+
+    return _stats(records, skipped, start)
+
+
+def export_records(vault: PasswordVault, path: str, fmt: Optional[str] = None,
+                   mapping: Optional[Dict[str, str]] = None, chunk_size: int = CHUNK_SIZE,
+                   progress: Optional[Callable[[int, float], None]] = None) -> Dict:
+    """
+    Потоковый экспорт в CSV или JSONL порциями по chunk_size записей.
+
+    mapping задает имя колонки (ключа) выходного файла для поля
+    хранилища; пустое имя исключает поле из выгрузки. Пароли в файле
+    не зашифрованы.
+    """
+    if not vault.unlocked:
+        raise VaultError("Хранилище заблокировано")
+
+    fmt = detect_format(path, fmt)
+    columns = _columns(EXPORT_FIELDS, mapping)
+    records = 0
+    start = time.perf_counter()
+
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = None
+        if fmt == 'csv':
+            writer = csv.DictWriter(f, fieldnames=list(columns.values()))
+            writer.writeheader()
+
+        for chunk in vault.iter_passwords(chunk_size):
+            rows = [{column: entry.get(field, '') for field, column in columns.items()}
+                    for entry in chunk]
+            if writer:
+                writer.writerows(rows)
+            else:
+                f.writelines(json.dumps(row, ensure_ascii=False) + '\n' for row in rows)
+            records += len(rows)
+            if progress:
+                progress(records, time.perf_counter() - start)
+
+    return _stats(records, 0, start)